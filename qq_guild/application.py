@@ -1,143 +1,186 @@
 import asyncio
-import aiohttp
 import inspect
-import json
 
-from typing import Callable
+from typing import Callable, Dict, List, Optional
 
-from .models.ws import Intents, Load, opcode
+from .models import lite
+from .models.ws import EVENT_MODELS, Intents, parse_event
 from .protocol import GuildBotProtocol
-from .logger import Network, Protocol, Session, Event
+from .cache import MessageHistory, StateCache
+from .cluster import ClusterSupervisor
+from .dispatcher import EventDispatcher, ExecutionMode, Handler
+from .filters import Filter, to_filter
+from .replay import FrameRecorder
+from .shard import Shard, ShardManager
+from .logger import Protocol, Event
 
 class GuildBot(GuildBotProtocol):
-    def __init__(self, app_id, token, sandbox=True, intents: Intents = Intents()):
-        self.url = 'https://api.sgroup.qq.com'
+    def __init__(
+        self,
+        app_id,
+        token,
+        sandbox=True,
+        intents: Intents = Intents(),
+        shard_count: Optional[int] = None,
+        shard_ids: Optional[List[int]] = None,
+        compress: bool = False,
+        dispatcher: Optional[EventDispatcher] = None,
+        recorder: Optional[FrameRecorder] = None,
+        **http_options
+    ):
+        url = 'https://api.sgroup.qq.com'
         if sandbox:
-            self.url = 'https://sandbox.api.sgroup.qq.com'
+            url = 'https://sandbox.api.sgroup.qq.com'
             Protocol.info("当前为沙箱环境")
 
-        self.token = f"Bot {app_id}.{token}"
+        super().__init__(url, f"Bot {app_id}.{token}", **http_options)
         self.intents = intents.to_int()
-        self.ws = None
+        # 使用 zlib-stream 压缩 Gateway 传输
+        self.compress = compress
+        # 未指定 shard_count 时使用 /gateway/bot 推荐的分片数
+        self.shard_manager = ShardManager(self, shard_count, shard_ids)
+        # 集群模式下为当前工作进程的 ClusterWorker
+        self.cluster = None
+        # 录制收到的 Gateway 帧，用于回放测试
+        self.recorder = recorder
 
-        self.s = 0
-        self.heartbeat_interval = 0
-        self.session = None
+        self.dispatcher = dispatcher or EventDispatcher()
+        self.event_models = lite.EVENT_MODELS if self.models is lite else EVENT_MODELS
+        self._handlers: Dict[str, List[Handler]] = {}
+        # 事件类型 -> 所有处理器共用的过滤条件，None 表示所有事件
+        self._filters: Dict[Optional[str], Filter] = {}
+        self.filtered = 0
+        # 无法解析而被丢弃的事件数
+        self.invalid_events = 0
 
-        self._handlers = {}
+    @property
+    def shards(self) -> Dict[int, Shard]:
+        return self.shard_manager.shards
+
+    def shard_status(self) -> List[dict]:
+        """获取各分片的连接状态、序列号与心跳延迟"""
+        return self.shard_manager.status()
 
     def run(self, loop=None):
         loop = loop or asyncio.new_event_loop()
-        loop.run_until_complete(self._run_async())
+        try:
+            loop.run_until_complete(self._run_async())
+        finally:
+            loop.run_until_complete(self.close())
+
+    def run_cluster(self, processes: Optional[int] = None):
+        """集群模式，将分片分配到多个工作进程运行，默认进程数为 CPU 核心数"""
+        ClusterSupervisor(self, processes).run()
+
+    async def close(self):
+        await self.shard_manager.close()
+        # 先等待执行中的事件处理器完成，再关闭 HTTP 连接池
+        await self.dispatcher.drain()
+        if self.recorder is not None:
+            self.recorder.close()
+        await super().close()
 
     async def _run_async(self):
-        session = aiohttp.ClientSession()
-        gateway_url = await self._get_gateway_url()
-        self.ws = await session.ws_connect(gateway_url)
-        await self.ws_event()
-    
-    async def _auth(self):
-        if self.session == None:
-            load = {
-                "op": opcode.Identify,
-                "d": {
-                    "token": self.token,
-                    "intents": self.intents,
-                    "shard": [0, 1],
-                    "properties": {
-                        "$os": "linux",
-                        "$browser": "python_sdk",
-                        "$device": "server"
-                    }
-                }
-            }
-        else:
-            load = {
-                "op": opcode.Resume,
-                "d": {
-                    "token": self.token,
-                    "session_id": self.session,
-                    "seq": 1337
-                }
-            }
-        await self.ws.send_json(load)
-    
-    async def _heartbeat(self):
-        while self._heartbeat:
-            await asyncio.sleep(self.heartbeat_interval)
-            try:
-                Network.info("发送心跳")
-                await self.ws.send_json({
-                    "op": opcode.Heartbeat,
-                    "d": self.s
-                })
-            except:
-                continue
-
-    async def ws_event(self):
-        while True:
-            message = await self.ws.receive()
-            Network.debug(f"接收内容: {message.data}")
-            if isinstance(message.data, int):
-                if message.data == 4009:
-                    Network.warn("连接过期，尝试重新登录")
-                elif message.data >= 4900:
-                    Network.warn("内部错误，尝试重新登录")
-                else:
-                    Network.error(f"发生意料之外的 opcode: {message.data}")
-                    return
-                # self.session = None
-                await self._run_async()
-                return
-            try:
-                message = json.loads(message.data)
-            except:
-                if message.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
-                    Network.info("连接已断开，尝试重连")
-                    await self._auth()
-                continue
-            load = Load.parse_obj(message)
-            op = load.op
-            if op == opcode.Hello:
-                self.heartbeat_interval = load.d.heartbeat_interval / 1000
-                await self._auth()
-            elif op == opcode.Dispatch:
-                self.s = load.s
-                t = load.t
-                if t == "READY":
-                    self.session = load.d.session_id
-                    Session.info(f"已连接: @{load.d.user.username} ({load.d.user.id})")
-                    asyncio.create_task(self._heartbeat())
-                elif t == "RESUMED":
-                    Network.info("重连成功")
-                self.event_handler(t, load.d) # 发送给事件处理器
-            elif op == opcode.InvalidSession:
-                Network.warn("连接参数错误，尝试重新登录")
-                self.session = None
-                await self._auth()
-            elif op == opcode.Reconnect:
-                Network.info("服务端通知重连，开始重连")
-                await self._auth()
-            elif op == opcode.HeartbeatACK:
-                Network.info("收到心跳响应")
-    
-    def add_event_handler(self, event_name, handler):
+        if self.outbox is not None:
+            self.outbox.start()
+        await self.shard_manager.start()
+
+    def add_event_handler(
+        self,
+        event_name,
+        handler,
+        pool: Optional[str] = None,
+        mode: str = ExecutionMode.LOOP,
+        then: Optional[Callable] = None,
+        filters=None
+    ):
         self._handlers.setdefault(event_name, [])
-        self._handlers[event_name].append(handler)
-        
-    def event_handler(self, event_name, event_data):
-        if self._handlers.get(event_name) is None:
+        self._handlers[event_name].append(Handler(handler, event_name, pool, mode, then, to_filter(filters)))
+
+    def add_filter(self, filters, event_name: Optional[str] = None):
+        """添加所有处理器共用的过滤条件，`event_name` 为 None 时作用于所有事件，例如 `bot.add_filter(NotBot())`"""
+        filters = to_filter(filters)
+        if filters is None:
             return
-        for handler in self._handlers[event_name]:
-            Event.info(f"处理事件: {event_name}")
-            asyncio.create_task(handler(self, event_data))
+        current = self._filters.get(event_name)
+        self._filters[event_name] = filters if current is None else current & filters
+
+    def _match(self, event_name, event_data, handlers: List[Handler]) -> List[Handler]:
+        """在解析之前用原始事件内容执行过滤条件，同一事件中相同的条件只计算一次"""
+        cache = {}
+        for key in (None, event_name):
+            shared = self._filters.get(key)
+            if shared is not None and not shared.evaluate(event_data, cache):
+                return []
+        matched = []
+        for handler in handlers:
+            if handler.filter is None or handler.filter.evaluate(event_data, cache):
+                matched.append(handler)
+            else:
+                handler.filtered += 1
+        return matched
+
+    async def event_handler(self, event_name, event_data):
+        try:
+            handlers, parsed = self._prepare_event(event_name, event_data)
+        except Exception:
+            # 单个事件解析或写入缓存失败时只丢弃该事件，不影响 Gateway 连接
+            self.invalid_events += 1
+            Event.exception(f"解析事件失败，已丢弃: {event_name}")
+            return
+        if handlers:
+            await self.dispatcher.dispatch(self, handlers, parsed)
+
+    def _prepare_event(self, event_name, event_data):
+        """更新缓存并执行过滤条件，返回匹配的事件处理器与解析后的事件"""
+        # 缓存需要的事件总是解析，过滤条件仍然作用于原始事件内容
+        parsed = None
+        if self.state is not None and event_name in StateCache.EVENTS:
+            parsed = parse_event(event_name, event_data, self.event_models)
+            self.state.update(event_name, parsed)
+        if self.history is not None and event_name in MessageHistory.EVENTS and isinstance(event_data, dict):
+            if parsed is None:
+                parsed = parse_event(event_name, event_data, self.event_models)
+            self.history.add(parsed)
+        handlers = self._handlers.get(event_name)
+        if not handlers:
+            return None, parsed
+        if isinstance(event_data, dict):
+            handlers = self._match(event_name, event_data, handlers)
+            if not handlers:
+                self.filtered += 1
+                return None, parsed
+        # 只有存在匹配的事件处理器时才解析事件内容，所有处理器共用同一个模型
+        if parsed is None:
+            parsed = parse_event(event_name, event_data, self.event_models)
+        return handlers, parsed
+
+    def handler_stats(self) -> List[dict]:
+        """获取各事件处理器的调用次数、异常次数、丢弃次数与耗时，无法解析的事件数见 `invalid_events`"""
+        return [handler.stats() for handlers in self._handlers.values() for handler in handlers]
+
+    def receiver(
+        self,
+        event_name,
+        pool: Optional[str] = None,
+        mode: str = ExecutionMode.LOOP,
+        then: Optional[Callable] = None,
+        filters=None
+    ):
+        """注册事件处理器，`mode` 为 `thread` 或 `process` 时处理器在线程池或进程池中执行
 
-    def receiver(self, event_name):
+        `filters` 为 `qq_guild.filters` 中的过滤条件 (或条件列表)，在解析事件之前执行，例如
+        `@bot.receiver("AT_MESSAGE_CREATE", filters=[NotBot(), Prefix("/help")])`。
+        """
         def receiver_warpper(handler: Callable):
-            if not inspect.iscoroutinefunction(handler):
-                raise TypeError("event body must be a coroutine function.")
+            if mode not in (ExecutionMode.LOOP, ExecutionMode.THREAD, ExecutionMode.PROCESS):
+                raise ValueError(f"未知的执行模式: {mode}")
+            if mode != ExecutionMode.LOOP and inspect.iscoroutinefunction(handler):
+                raise TypeError("event body must be a regular function when offloaded to a thread or process pool.")
+            if then is not None and not inspect.iscoroutinefunction(then):
+                raise TypeError("then callback must be a coroutine function.")
             
-            self.add_event_handler(event_name, handler)
+            self.add_event_handler(event_name, handler, pool, mode, then, filters)
             return handler
 
-        return receiver_warpper
\ No newline at end of file
+        return receiver_warpper
@@ -0,0 +1,132 @@
+import time
+
+from collections import deque
+from typing import Dict, Optional
+
+from .logger import Network
+
+class BreakerState:
+    # 正常放行请求
+    CLOSED = "closed"
+    # 错误率超过阈值，请求直接失败
+    OPEN = "open"
+    # 打开一段时间后放行少量探测请求
+    HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """单个路由桶的熔断器
+
+    最近 `window` 个请求中失败比例达到 `failure_rate` (且至少有 `minimum_requests` 个请求) 时打开，
+    `open_duration` 秒内的请求直接失败；之后进入半开状态，放行最多 `half_open_probes` 个探测请求，
+    探测成功则关闭，失败则重新打开。
+    """
+    __slots__ = (
+        "key", "failure_rate", "minimum_requests", "open_duration", "half_open_probes",
+        "state", "results", "failures", "opened_at", "probes", "rejected", "transitions"
+    )
+
+    def __init__(
+        self,
+        key: str,
+        failure_rate: float = 0.5,
+        minimum_requests: int = 20,
+        window: int = 100,
+        open_duration: float = 10,
+        half_open_probes: int = 1
+    ):
+        self.key = key
+        self.failure_rate = failure_rate
+        self.minimum_requests = minimum_requests
+        self.open_duration = open_duration
+        self.half_open_probes = half_open_probes
+
+        self.state = BreakerState.CLOSED
+        self.results = deque(maxlen=window)
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self.rejected = 0
+        self.transitions = {BreakerState.CLOSED: 0, BreakerState.OPEN: 0, BreakerState.HALF_OPEN: 0}
+
+    def _transition(self, state: str):
+        self.state = state
+        self.transitions[state] += 1
+        if state == BreakerState.OPEN:
+            self.opened_at = time.monotonic()
+            Network.warn(f"{self.key} 熔断器打开，错误率 {self.error_rate():.0%}")
+        elif state == BreakerState.CLOSED:
+            self.results.clear()
+            self.failures = 0
+            Network.info(f"{self.key} 熔断器关闭")
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.open_duration - time.monotonic())
+
+    def allow(self) -> bool:
+        """是否放行请求，放行后必须调用 `record`"""
+        if self.state == BreakerState.OPEN:
+            if self.retry_after() > 0:
+                self.rejected += 1
+                return False
+            self._transition(BreakerState.HALF_OPEN)
+            self.probes = 0
+        if self.state == BreakerState.HALF_OPEN:
+            if self.probes >= self.half_open_probes:
+                self.rejected += 1
+                return False
+            self.probes += 1
+        return True
+
+    def release(self):
+        """放行的请求被取消，不计入结果"""
+        if self.state == BreakerState.HALF_OPEN:
+            self.probes = max(0, self.probes - 1)
+
+    def record(self, success: bool):
+        if self.state == BreakerState.HALF_OPEN:
+            self.probes = max(0, self.probes - 1)
+            self._transition(BreakerState.CLOSED if success else BreakerState.OPEN)
+            return
+        if len(self.results) == self.results.maxlen and not self.results[0]:
+            self.failures -= 1
+        self.results.append(success)
+        if not success:
+            self.failures += 1
+            if (
+                self.state == BreakerState.CLOSED
+                and len(self.results) >= self.minimum_requests
+                and self.error_rate() >= self.failure_rate
+            ):
+                self._transition(BreakerState.OPEN)
+
+    def error_rate(self) -> float:
+        return self.failures / len(self.results) if self.results else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "error_rate": self.error_rate(),
+            "requests": len(self.results),
+            "rejected": self.rejected,
+            "transitions": dict(self.transitions)
+        }
+
+class CircuitBreakers:
+    """按路由桶 (`METHOD /route/{template}`) 创建熔断器，参数见 `CircuitBreaker`"""
+    def __init__(self, **options):
+        self.options = options
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, key: str) -> CircuitBreaker:
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(key, **self.options)
+            self._breakers[key] = breaker
+        return breaker
+
+    def state(self, key: str) -> Optional[str]:
+        breaker = self._breakers.get(key)
+        return breaker.state if breaker is not None else None
+
+    def stats(self) -> dict:
+        return {key: breaker.stats() for key, breaker in self._breakers.items()}
@@ -0,0 +1,81 @@
+import asyncio
+
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional
+
+from .errors import NetworkError, RateLimited, ServerError
+from .retry import RetryPolicy
+
+# 可以重试的临时错误，其余错误 (例如 404、403、熔断) 重试也不会成功
+TRANSIENT_ERRORS = (NetworkError, ServerError, RateLimited)
+
+class BulkResult:
+    """批量操作中单个目标的执行结果"""
+    __slots__ = ("target", "ok", "result", "error", "attempts")
+
+    def __init__(self, target, ok: bool, result=None, error: Optional[BaseException] = None, attempts: int = 1):
+        self.target = target
+        self.ok = ok
+        self.result = result
+        self.error = error
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f"BulkResult(target={self.target!r}, ok={self.ok}, attempts={self.attempts}, error={self.error!r})"
+
+async def _run_one(
+    func: Callable[..., Awaitable],
+    target,
+    retries: int,
+    retry_delay: float,
+    policy: Optional[RetryPolicy]
+) -> BulkResult:
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            result = await func(target)
+        except TRANSIENT_ERRORS as e:
+            error = e
+        except Exception as e:
+            return BulkResult(target, False, error=e, attempts=attempt)
+        else:
+            # 返回 False 的接口视为失败
+            return BulkResult(target, result is not False, result, attempts=attempt)
+        # 重试与请求内部的重试共用同一个重试预算
+        if attempt > retries or (policy is not None and not policy.acquire()):
+            return BulkResult(target, False, error=error, attempts=attempt)
+        delay = retry_delay * 2 ** (attempt - 1)
+        if isinstance(error, RateLimited) and error.retry_after is not None:
+            delay = max(delay, error.retry_after)
+        await asyncio.sleep(delay)
+
+async def run_bulk(
+    func: Callable[..., Awaitable],
+    targets: Iterable,
+    concurrency: int = 10,
+    retries: int = 0,
+    retry_delay: float = 1.0,
+    policy: Optional[RetryPolicy] = None
+) -> AsyncIterator[BulkResult]:
+    """对每个目标调用 `func`，同时最多执行 `concurrency` 个，按完成顺序返回结果
+
+    网络错误、5xx 与 429 的目标会按 `retry_delay` 指数退避重试 `retries` 次 (429 至少等待 `retry_after`)，
+    指定 `policy` 时每次重试消耗其重试预算；仍然失败的结果 `ok` 为 False，可以收集其 `target` 再次执行。
+    目标按需从 `targets` 中读取，可以传入生成器。
+    """
+    targets = iter(targets)
+    pending = set()
+    try:
+        while True:
+            for target in targets:
+                pending.add(asyncio.ensure_future(_run_one(func, target, retries, retry_delay, policy)))
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,298 @@
+import asyncio
+import sys
+import time
+
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+from .models import api
+from .models.api import Channel, Guild, Member
+
+class LRUCache:
+    """带容量上限与过期时间的 LRU 缓存，`max_size` 为 0 时不缓存，为 None 时不限制容量"""
+    __slots__ = ("max_size", "ttl", "_data", "hits", "misses", "evictions")
+
+    def __init__(self, max_size: Optional[int] = 1000, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable):
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value, ttl: Optional[float] = None):
+        if self.max_size == 0:
+            return
+        ttl = ttl if ttl is not None else self.ttl
+        self._data[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+        self._data.move_to_end(key)
+        if self.max_size is not None:
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable):
+        item = self._data.pop(key, None)
+        return item[0] if item is not None else None
+
+    def remove_if(self, predicate: Callable[[Hashable, object], bool]) -> int:
+        """移除 `predicate(key, value)` 为真的所有项，返回移除的数量"""
+        keys = [key for key, (value, _) in self._data.items() if predicate(key, value)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions
+        }
+
+class RequestCoalescer:
+    """合并相同的并发请求，所有调用方共享同一个结果
+
+    `ttls` 按路由模板 (例如 `/guilds/{guild_id}/members/{user_id}`) 设置结果缓存的秒数，未设置的路由只合并并发请求。
+    """
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_size: Optional[int] = 10000):
+        self.ttls = ttls or {}
+        self.results = LRUCache(max_size)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+        self.requests = 0
+        self.coalesced = 0
+        self.fetches = 0
+
+    async def get(self, key: Hashable, route: str, fetch: Callable[[], Awaitable]):
+        self.requests += 1
+        ttl = self.ttls.get(route)
+        if ttl is not None:
+            cached = self.results.get(key)
+            if cached is not None:
+                return cached
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, ttl, fetch))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+        # 单个调用方被取消时不影响其他等待同一结果的调用方
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: Hashable, ttl: Optional[float], fetch: Callable[[], Awaitable]):
+        self.fetches += 1
+        try:
+            result = await fetch()
+        finally:
+            self._inflight.pop(key, None)
+        if ttl is not None and result is not None:
+            self.results.set(key, result, ttl)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "fetches": self.fetches,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "cache": self.results.stats()
+        }
+
+def _member_key(guild_id: str, user_id: str):
+    # 缓存键使用驻留字符串，大量成员共享同一个 guild_id 对象
+    return (sys.intern(guild_id), sys.intern(user_id))
+
+class StateCache:
+    """由 Gateway 事件维护的频道、子频道与成员缓存
+
+    每类实体可以分别设置容量上限与过期时间，`get_guild_info`、`get_channel`、`get_member` 会优先读取缓存；
+    机器人自身修改子频道或成员的 REST 调用成功后会更新或移除对应的缓存。
+    """
+    # 会更新缓存的事件类型
+    EVENTS = {
+        "GUILD_CREATE", "GUILD_UPDATE", "GUILD_DELETE",
+        "CHANNEL_CREATE", "CHANNEL_UPDATE", "CHANNEL_DELETE",
+        "GUILD_MEMBER_ADD", "GUILD_MEMBER_UPDATE", "GUILD_MEMBER_REMOVE"
+    }
+
+    def __init__(
+        self,
+        max_guilds: Optional[int] = None,
+        max_channels: Optional[int] = None,
+        max_members: Optional[int] = 100000,
+        guild_ttl: Optional[float] = None,
+        channel_ttl: Optional[float] = None,
+        member_ttl: Optional[float] = 3600
+    ):
+        self.guilds = LRUCache(max_guilds, guild_ttl)
+        self.channels = LRUCache(max_channels, channel_ttl)
+        self.members = LRUCache(max_members, member_ttl)
+        # 由 Gateway 事件构造的成员使用机器人的模型 (pydantic 或 lite)，与 REST 返回值的类型一致
+        self.models = api
+
+    def bind(self, models):
+        self.models = models
+
+    def update(self, event_name: str, event_data):
+        """根据 Gateway 事件更新缓存"""
+        if event_name in ("GUILD_CREATE", "GUILD_UPDATE"):
+            self.set_guild(event_data)
+        elif event_name == "GUILD_DELETE":
+            self.remove_guild(event_data.id)
+        elif event_name in ("CHANNEL_CREATE", "CHANNEL_UPDATE"):
+            self.set_channel(event_data)
+        elif event_name == "CHANNEL_DELETE":
+            self.remove_channel(event_data.id)
+        elif event_name in ("GUILD_MEMBER_ADD", "GUILD_MEMBER_UPDATE"):
+            self.set_member(event_data.guild_id, self.models.Member.construct(
+                user=event_data.user,
+                nick=event_data.nick,
+                roles=event_data.roles,
+                joined_at=event_data.joined_at
+            ))
+        elif event_name == "GUILD_MEMBER_REMOVE":
+            self.remove_member(event_data.guild_id, event_data.user.id)
+
+    def get_guild(self, guild_id: str) -> Optional[Guild]:
+        return self.guilds.get(guild_id)
+
+    def set_guild(self, guild: Guild):
+        self.guilds.set(sys.intern(guild.id), guild)
+
+    def remove_guild(self, guild_id: str):
+        """移除频道及其下的子频道与成员"""
+        self.guilds.pop(guild_id)
+        self.channels.remove_if(lambda _, channel: channel.guild_id == guild_id)
+        self.members.remove_if(lambda key, _: key[0] == guild_id)
+
+    def get_channel(self, channel_id: str) -> Optional[Channel]:
+        return self.channels.get(channel_id)
+
+    def set_channel(self, channel: Channel):
+        self.channels.set(sys.intern(channel.id), channel)
+
+    def remove_channel(self, channel_id: str):
+        self.channels.pop(channel_id)
+
+    def get_member(self, guild_id: str, user_id: str) -> Optional[Member]:
+        return self.members.get((guild_id, user_id))
+
+    def set_member(self, guild_id: str, member: Member):
+        if member.user is None:
+            return
+        self.members.set(_member_key(guild_id, member.user.id), member)
+
+    def remove_member(self, guild_id: str, user_id: str):
+        self.members.pop((guild_id, user_id))
+
+    def stats(self) -> dict:
+        return {
+            "guilds": self.guilds.stats(),
+            "channels": self.channels.stats(),
+            "members": self.members.stats()
+        }
+
+class MessageHistory:
+    """按子频道保存最近消息的环形缓冲区，由消息事件维护
+
+    每个子频道最多保存 `per_channel` 条消息，所有子频道合计最多 `max_messages` 条，
+    超出总数时从最久没有新消息的子频道中移除最早的消息。按消息 ID 查找为 O(1)，`get_message` 会优先读取。
+    """
+    # 会写入历史的事件类型
+    EVENTS = {"AT_MESSAGE_CREATE", "DIRECT_MESSAGE_CREATE"}
+
+    def __init__(self, per_channel: int = 100, max_messages: int = 100000):
+        if per_channel < 1:
+            raise ValueError("per_channel 至少为 1")
+        self.per_channel = per_channel
+        self.max_messages = max_messages
+        # 子频道 -> 消息 ID，按最近有新消息的顺序排列
+        self.channels: OrderedDict = OrderedDict()
+        self.messages: Dict[str, object] = {}
+
+        self.hits = 0
+        self.misses = 0
+        # 子频道缓冲区已满与总数超出上限时移除的消息数
+        self.channel_evictions = 0
+        self.global_evictions = 0
+
+    def __len__(self):
+        return len(self.messages)
+
+    def add(self, message):
+        message_id = message.id
+        if message_id in self.messages:
+            self.messages[message_id] = message
+            return
+        channel_id = sys.intern(message.channel_id)
+        buffer: Optional[Deque[str]] = self.channels.get(channel_id)
+        if buffer is None:
+            buffer = self.channels[channel_id] = deque()
+        else:
+            self.channels.move_to_end(channel_id)
+        if len(buffer) >= self.per_channel:
+            self.messages.pop(buffer.popleft(), None)
+            self.channel_evictions += 1
+        buffer.append(message_id)
+        self.messages[message_id] = message
+
+        while len(self.messages) > self.max_messages:
+            oldest_id, oldest = next(iter(self.channels.items()))
+            self.messages.pop(oldest.popleft(), None)
+            self.global_evictions += 1
+            if not oldest:
+                del self.channels[oldest_id]
+
+    def get(self, message_id: str):
+        message = self.messages.get(message_id)
+        if message is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return message
+
+    def recent(self, channel_id: str, limit: Optional[int] = None) -> List:
+        """获取子频道最近的消息，按时间从早到晚排列"""
+        buffer = self.channels.get(channel_id)
+        if not buffer or (limit is not None and limit <= 0):
+            return []
+        ids = list(buffer) if limit is None else list(buffer)[-limit:]
+        return [self.messages[message_id] for message_id in ids]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.messages),
+            "max_messages": self.max_messages,
+            "channels": len(self.channels),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "channel_evictions": self.channel_evictions,
+            "global_evictions": self.global_evictions
+        }
@@ -0,0 +1,264 @@
+import asyncio
+import inspect
+import itertools
+import multiprocessing
+import os
+
+from typing import Dict, List, Optional
+
+from .shard import IdentifyLimiter, ShardManager
+from .logger import Session
+
+class ClusterShardManager(ShardManager):
+    """工作进程中的分片管理器，identify 节流交由主进程统一调度"""
+    def __init__(self, bot, worker: "ClusterWorker", shard_count: int, shard_ids: List[int]):
+        super().__init__(bot, shard_count, shard_ids)
+        self.worker = worker
+
+    async def wait_identify(self, shard_id: int):
+        await self.worker.wait_identify(shard_id)
+
+class ClusterWorker:
+    """运行在工作进程中的一组分片，拥有独立的事件循环与 HTTP 连接池，通过管道与主进程通信
+
+    事件处理器中可以通过 `bot.cluster` 访问当前工作进程：
+
+    - `await bot.cluster.call("send_message", channel_id, content="...", worker=1)` 由指定工作进程发起 REST 请求
+    - `bot.cluster.publish("CUSTOM_EVENT", data)` 将自定义事件广播给所有工作进程的事件处理器
+    """
+    def __init__(self, bot, worker_id: int, conn, shard_count: int, shard_ids: List[int]):
+        self.bot = bot
+        self.worker_id = worker_id
+        self.conn = conn
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+
+        self._call_ids = itertools.count()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._identify: Dict[int, asyncio.Future] = {}
+        self._main: Optional[asyncio.Task] = None
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._run_async())
+        finally:
+            loop.run_until_complete(self.bot.close())
+            loop.close()
+
+    async def _run_async(self):
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self.conn.fileno(), self._on_readable)
+        self.bot.cluster = self
+        if self.bot.recorder is not None:
+            self.bot.recorder.for_worker(self.worker_id)
+        if self.bot.outbox is not None:
+            self.bot.outbox.for_worker(self.worker_id)
+        self.bot.shard_manager = ClusterShardManager(self.bot, self, self.shard_count, self.shard_ids)
+        Session.info(f"工作进程 {self.worker_id} ({os.getpid()}) 启动，负责分片 {self.shard_ids}")
+        self._main = asyncio.ensure_future(self.bot._run_async())
+        try:
+            await self._main
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.remove_reader(self.conn.fileno())
+
+    def _send(self, *message):
+        self.conn.send(message)
+
+    def _on_readable(self):
+        try:
+            while self.conn.poll():
+                self._handle(self.conn.recv())
+        except (EOFError, OSError):
+            # 主进程已退出
+            if self._main is not None:
+                self._main.cancel()
+
+    def _handle(self, message):
+        kind = message[0]
+        if kind == "identify":
+            future = self._identify.pop(message[1], None)
+            if future is not None and not future.done():
+                future.set_result(None)
+        elif kind == "call":
+            _, call_id, name, args, kwargs = message
+            asyncio.ensure_future(self._execute(call_id, name, args, kwargs))
+        elif kind == "result":
+            _, call_id, ok, value = message
+            future = self._pending.pop(call_id, None)
+            if future is not None and not future.done():
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(RuntimeError(value))
+        elif kind == "event":
+            asyncio.ensure_future(self.bot.event_handler(message[1], message[2]))
+        elif kind == "stop":
+            if self._main is not None:
+                self._main.cancel()
+
+    async def _execute(self, call_id, name, args, kwargs):
+        try:
+            result = getattr(self.bot, name)(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            self._send("result", call_id, True, result)
+        except Exception as e:
+            self._send("result", call_id, False, f"{type(e).__name__}: {e}")
+
+    async def wait_identify(self, shard_id: int):
+        future = asyncio.get_running_loop().create_future()
+        self._identify[shard_id] = future
+        self._send("identify", shard_id)
+        await future
+
+    async def call(self, name: str, *args, worker: Optional[int] = None, **kwargs):
+        """由指定 (或任意) 工作进程调用机器人方法，例如 REST API"""
+        call_id = next(self._call_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[call_id] = future
+        self._send("call", call_id, worker, name, args, kwargs)
+        return await future
+
+    def publish(self, event_name: str, event_data):
+        """将事件广播给所有工作进程 (包括自身) 的事件处理器"""
+        self._send("event", event_name, event_data)
+
+def _worker_main(bot, worker_id, conn, shard_count, shard_ids, inherited=()):
+    # 工作进程继承了主进程一端的管道 (包括其他工作进程的)，不关闭的话主进程退出后工作进程收不到 EOF
+    for parent_conn in inherited:
+        parent_conn.close()
+    ClusterWorker(bot, worker_id, conn, shard_count, shard_ids).run()
+
+class ClusterSupervisor:
+    """将分片分配到多个工作进程运行，主进程负责 identify 节流、异常退出后的重启与进程间消息转发"""
+    # 工作进程异常退出后重启前的等待时间 (秒)
+    RESTART_DELAY = 1
+
+    def __init__(self, bot, processes: Optional[int] = None):
+        self.bot = bot
+        self.processes = processes or os.cpu_count() or 1
+        # 工作进程需要继承机器人对象与已注册的事件处理器 (通常是闭包，不能 pickle)，只支持 fork
+        self.context = multiprocessing.get_context("fork")
+
+        self.shard_count = 0
+        self.identify_limiter = IdentifyLimiter()
+        self.workers: Dict[int, multiprocessing.Process] = {}
+        self._conns = {}
+        self._assignments: Dict[int, List[int]] = {}
+        # 转发中的调用: 目标工作进程 -> {(来源工作进程, call_id)}
+        self._inflight: Dict[int, set] = {}
+        self._round_robin = itertools.count()
+        self._stopping = False
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._run_async())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            loop.close()
+
+    async def _run_async(self):
+        gateway = await self.bot._get_shards_gateway_url()
+        # 子进程会创建自己的连接池，fork 前关闭主进程中的 ClientSession
+        await self.bot.close()
+
+        self.shard_count = self.bot.shard_manager.shard_count or gateway.shards
+        shard_ids = self.bot.shard_manager.shard_ids
+        if shard_ids is None:
+            shard_ids = list(range(self.shard_count))
+        self.identify_limiter = IdentifyLimiter(gateway.session_start_limit.max_concurrency, ShardManager.IDENTIFY_INTERVAL)
+
+        processes = min(self.processes, len(shard_ids))
+        self._assignments = {i: list(shard_ids[i::processes]) for i in range(processes)}
+        Session.info(f"集群模式: {processes} 个工作进程，共 {self.shard_count} 个分片")
+        for worker_id in self._assignments:
+            self._start_worker(worker_id)
+
+        while not self._stopping:
+            await asyncio.sleep(self.RESTART_DELAY)
+            for worker_id, process in list(self.workers.items()):
+                if not process.is_alive() and not self._stopping:
+                    Session.warn(f"工作进程 {worker_id} 已退出 (exitcode={process.exitcode})，正在重启")
+                    self._drop_worker(worker_id)
+                    self._start_worker(worker_id)
+
+    def _start_worker(self, worker_id: int):
+        parent_conn, child_conn = self.context.Pipe()
+        inherited = [parent_conn, *self._conns.values()]
+        process = self.context.Process(
+            target=_worker_main,
+            args=(self.bot, worker_id, child_conn, self.shard_count, self._assignments[worker_id], inherited)
+        )
+        process.start()
+        child_conn.close()
+        self.workers[worker_id] = process
+        self._conns[worker_id] = parent_conn
+        self._inflight[worker_id] = set()
+        asyncio.get_running_loop().add_reader(parent_conn.fileno(), self._on_readable, worker_id)
+
+    def _drop_worker(self, worker_id: int):
+        conn = self._conns.pop(worker_id)
+        asyncio.get_running_loop().remove_reader(conn.fileno())
+        conn.close()
+        # 向等待结果的调用方返回错误
+        for origin, call_id in self._inflight.pop(worker_id, ()):
+            self._send(origin, "result", call_id, False, f"工作进程 {worker_id} 已退出")
+
+    def _send(self, worker_id: int, *message):
+        conn = self._conns.get(worker_id)
+        if conn is None:
+            return
+        try:
+            conn.send(message)
+        except (BrokenPipeError, OSError):
+            pass
+
+    def _on_readable(self, worker_id: int):
+        conn = self._conns[worker_id]
+        try:
+            while conn.poll():
+                self._handle(worker_id, conn.recv())
+        except (EOFError, OSError):
+            asyncio.get_running_loop().remove_reader(conn.fileno())
+
+    def _handle(self, worker_id: int, message):
+        kind = message[0]
+        if kind == "identify":
+            asyncio.ensure_future(self._identify(worker_id, message[1]))
+        elif kind == "call":
+            _, call_id, target, name, args, kwargs = message
+            if target is None or target not in self._conns:
+                workers = list(self._conns)
+                if not workers:
+                    self._send(worker_id, "result", call_id, False, "没有可用的工作进程")
+                    return
+                target = workers[next(self._round_robin) % len(workers)]
+            self._inflight[target].add((worker_id, call_id))
+            self._send(target, "call", (worker_id, call_id), name, args, kwargs)
+        elif kind == "result":
+            _, (origin, call_id), ok, value = message
+            self._inflight.get(worker_id, set()).discard((origin, call_id))
+            self._send(origin, "result", call_id, ok, value)
+        elif kind == "event":
+            for target in self._conns:
+                self._send(target, *message)
+
+    async def _identify(self, worker_id: int, shard_id: int):
+        await self.identify_limiter.wait(shard_id)
+        self._send(worker_id, "identify", shard_id)
+
+    def stop(self):
+        self._stopping = True
+        for worker_id in list(self._conns):
+            self._send(worker_id, "stop")
+        for process in self.workers.values():
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
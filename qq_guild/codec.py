@@ -0,0 +1,70 @@
+import json
+
+from typing import Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+class JSONCodec:
+    """标准库 json 编解码器"""
+    name = "json"
+
+    def loads(self, data: Union[str, bytes]):
+        # json.loads 可以直接解析 bytes，不需要先解码为 str
+        return json.loads(data)
+
+    def dumps(self, obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps_bytes(self, obj) -> bytes:
+        return self.dumps(obj).encode("utf-8")
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def loads(self, data: Union[str, bytes]):
+        return orjson.loads(data)
+
+    def dumps(self, obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    def dumps_bytes(self, obj) -> bytes:
+        return orjson.dumps(obj)
+
+class UjsonCodec(JSONCodec):
+    name = "ujson"
+
+    def loads(self, data: Union[str, bytes]):
+        return ujson.loads(data)
+
+    def dumps(self, obj) -> str:
+        return ujson.dumps(obj, ensure_ascii=False)
+
+CODECS = {
+    "json": JSONCodec,
+    "orjson": OrjsonCodec,
+    "ujson": UjsonCodec
+}
+
+def get_codec(name: Optional[str] = None) -> JSONCodec:
+    """获取指定的编解码器，未指定时按 orjson、ujson、json 的顺序选择已安装的库"""
+    if name is None:
+        if orjson is not None:
+            return OrjsonCodec()
+        if ujson is not None:
+            return UjsonCodec()
+        return JSONCodec()
+    if name not in CODECS:
+        raise ValueError(f"未知的 JSON 编解码器: {name}")
+    if (name == "orjson" and orjson is None) or (name == "ujson" and ujson is None):
+        raise ImportError(f"未安装 {name}")
+    return CODECS[name]()
+
+default_codec = get_codec()
@@ -0,0 +1,188 @@
+import inspect
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .filters import NotBot, Prefix, strip_mention
+from .logger import Event
+
+class CommandError(Exception):
+    """命令参数缺失或无法转换"""
+
+def _to_bool(value: str) -> bool:
+    lowered = value.lower()
+    if lowered in ("1", "true", "yes", "y", "on", "是"):
+        return True
+    if lowered in ("0", "false", "no", "n", "off", "否"):
+        return False
+    raise ValueError(value)
+
+# 参数类型注解 -> 转换函数，未注解的参数保持字符串
+_CONVERTERS = {
+    int: int,
+    float: float,
+    bool: _to_bool,
+    str: str
+}
+
+class Command:
+    """已注册的命令，按处理器的函数签名解析参数
+
+    处理器以 `(bot, message, ...)` 调用，其余位置参数按空白分隔依次填入并按类型注解转换；
+    `*args` 接收剩余的参数，仅限关键字参数 (`*, text: str`) 接收剩余的原始文本。
+    """
+    __slots__ = ("name", "callback", "params", "varargs", "rest", "calls", "errors")
+
+    def __init__(self, name: str, callback: Callable):
+        self.name = name
+        self.callback = callback
+        # (参数名, 转换函数, 默认值)
+        self.params: List[Tuple[str, Callable, object]] = []
+        self.varargs: Optional[Callable] = None
+        self.rest: Optional[str] = None
+        self.calls = 0
+        self.errors = 0
+
+        for param in list(inspect.signature(callback).parameters.values())[2:]:
+            converter = _CONVERTERS.get(param.annotation, str)
+            if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
+                self.params.append((param.name, converter, param.default))
+            elif param.kind == param.VAR_POSITIONAL:
+                self.varargs = converter
+            elif param.kind == param.KEYWORD_ONLY and self.rest is None:
+                self.rest = param.name
+
+    def parse(self, text: str) -> Tuple[list, dict]:
+        args = []
+        for name, converter, default in self.params:
+            parts = text.split(None, 1)
+            if not parts:
+                if default is inspect.Parameter.empty:
+                    raise CommandError(f"缺少参数: {name}")
+                args.append(default)
+                continue
+            args.append(self._convert(name, converter, parts[0]))
+            text = parts[1] if len(parts) > 1 else ""
+        kwargs = {}
+        if self.varargs is not None:
+            args.extend(self._convert("*args", self.varargs, value) for value in text.split())
+        elif self.rest is not None:
+            kwargs[self.rest] = text.strip()
+        return args, kwargs
+
+    def _convert(self, name: str, converter: Callable, value: str):
+        try:
+            return converter(value)
+        except ValueError:
+            raise CommandError(f"参数 {name} 的值无效: {value}") from None
+
+class _Node:
+    __slots__ = ("children", "command")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.command: Optional[Command] = None
+
+class CommandRouter:
+    """基于前缀树的命令路由
+
+    命令名 (含前缀) 编译为字符前缀树，每条消息只需沿树走一遍命令名的长度，与命令数量无关；
+    只有匹配的命令处理器会被调用。消息开头的 @ 会被去掉，不以 `prefix` 开头的消息在解析为模型之前就被过滤。
+
+        router = CommandRouter(prefix="/")
+
+        @router.command("roll", "r")
+        async def roll(bot, message, sides: int = 6):
+            ...
+
+        router.attach(bot)
+    """
+    def __init__(
+        self,
+        prefix: str = "/",
+        events=("AT_MESSAGE_CREATE",),
+        ignore_bots: bool = True,
+        case_sensitive: bool = True,
+        on_error: Optional[Callable] = None
+    ):
+        self.prefix = prefix
+        self.events = events
+        self.ignore_bots = ignore_bots
+        self.case_sensitive = case_sensitive
+        # 参数解析失败时调用 `on_error(bot, message, error)` 协程，未指定时只记录日志
+        self.on_error = on_error
+        self.commands: Dict[str, Command] = {}
+        self._root = _Node()
+        self.unmatched = 0
+
+    def add_command(self, callback: Callable, name: str, *aliases: str) -> Command:
+        command = Command(name, callback)
+        for alias in (name,) + aliases:
+            key = self.prefix + alias
+            if not self.case_sensitive:
+                key = key.lower()
+            node = self._root
+            for char in key:
+                node = node.children.setdefault(char, _Node())
+            if node.command is not None:
+                raise ValueError(f"命令已存在: {alias}")
+            node.command = command
+            self.commands[alias] = command
+        return command
+
+    def command(self, name: str, *aliases: str):
+        """注册命令处理器"""
+        def command_wrapper(callback: Callable):
+            self.add_command(callback, name, *aliases)
+            return callback
+
+        return command_wrapper
+
+    def match(self, content: str) -> Tuple[Optional[Command], str]:
+        """返回匹配的命令与命令之后的参数文本，命令名之后必须是空白或消息结尾"""
+        text = strip_mention(content)
+        key = text if self.case_sensitive else text.lower()
+        node = self._root
+        matched, end = None, 0
+        for i, char in enumerate(key):
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.command is not None and (i + 1 == len(key) or key[i + 1].isspace()):
+                matched, end = node.command, i + 1
+        return matched, text[end:]
+
+    async def handle(self, bot, message):
+        command, text = self.match(message.content or "")
+        if command is None:
+            self.unmatched += 1
+            return
+        command.calls += 1
+        try:
+            args, kwargs = command.parse(text)
+        except CommandError as e:
+            command.errors += 1
+            if self.on_error is not None:
+                await self.on_error(bot, message, e)
+            else:
+                Event.warn(f"命令 {command.name} 参数错误: {e}")
+            return
+        result = command.callback(bot, message, *args, **kwargs)
+        if inspect.isawaitable(result):
+            await result
+
+    def attach(self, bot, pool: Optional[str] = None):
+        """将命令路由注册为机器人的事件处理器"""
+        filters = [Prefix(self.prefix)] if self.case_sensitive else []
+        if self.ignore_bots:
+            filters.append(NotBot())
+        for event_name in self.events:
+            bot.receiver(event_name, pool=pool, filters=filters)(self.handle)
+
+    def stats(self) -> dict:
+        return {
+            "unmatched": self.unmatched,
+            "commands": {
+                command.name: {"calls": command.calls, "errors": command.errors}
+                for command in set(self.commands.values())
+            }
+        }
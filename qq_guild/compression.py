@@ -0,0 +1,47 @@
+import zlib
+
+from typing import Optional
+
+# zlib-stream 每条完整消息以 Z_SYNC_FLUSH 结尾
+ZLIB_SUFFIX = b"\x00\x00\xff\xff"
+
+class ZlibStreamInflater:
+    """Gateway zlib-stream 解压器
+
+    整个连接共用一个压缩上下文，每个连接需要使用新的实例。
+    一条消息可能被拆分为多个二进制帧，收到以 `ZLIB_SUFFIX` 结尾的帧后才解压。
+    """
+    def __init__(self):
+        self._inflator = zlib.decompressobj()
+        # 分帧消息的缓冲区，只增长不收缩，后续消息复用已分配的内存
+        self._buffer = bytearray()
+        self._size = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def feed(self, data: bytes) -> Optional[bytes]:
+        """写入一个二进制帧，消息完整时返回解压后的内容，否则返回 None"""
+        self.bytes_in += len(data)
+        if self._size == 0 and data[-4:] == ZLIB_SUFFIX:
+            # 单帧消息直接解压，不经过缓冲区
+            out = self._inflator.decompress(data)
+        else:
+            end = self._size + len(data)
+            if end > len(self._buffer):
+                self._buffer.extend(bytes(end - len(self._buffer)))
+            self._buffer[self._size:end] = data
+            self._size = end
+            if self._buffer[end - 4:end] != ZLIB_SUFFIX:
+                return None
+            with memoryview(self._buffer)[:end] as chunk:
+                out = self._inflator.decompress(chunk)
+            self._size = 0
+        self.bytes_out += len(out)
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": self.bytes_in / self.bytes_out if self.bytes_out else 0.0
+        }
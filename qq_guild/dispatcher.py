@@ -0,0 +1,273 @@
+import asyncio
+import inspect
+import time
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from .filters import Filter
+from .stats import LatencyRecorder
+from .logger import Event
+
+class OverflowPolicy:
+    # 队列已满时等待，背压传递到 Gateway 的读取
+    BLOCK = "block"
+    # 丢弃新事件
+    DROP = "drop"
+    # 丢弃队列中最早的事件
+    SHED = "shed"
+
+class ExecutionMode:
+    # 在事件循环中执行，支持协程函数与普通函数
+    LOOP = "loop"
+    # 在线程池中执行普通函数
+    THREAD = "thread"
+    # 在进程池中执行普通函数，函数需要可以被 pickle (模块级函数)
+    PROCESS = "process"
+
+class Handler:
+    """已注册的事件处理器及其统计信息
+
+    `loop` 模式的处理器以 `(bot, event)` 调用；`thread` 与 `process` 模式的处理器只接收 `event`，
+    返回值会交给 `then(bot, event, result)` 协程在事件循环中处理，例如调用 REST API 发送结果。
+    `filter` 在事件解析之前作用于原始事件内容，不满足条件的事件不会交给该处理器。
+    """
+    __slots__ = ("callback", "event_name", "pool", "mode", "then", "filter", "calls", "errors", "dropped", "filtered", "latency")
+
+    def __init__(
+        self,
+        callback: Callable,
+        event_name: str,
+        pool: Optional[str] = None,
+        mode: str = ExecutionMode.LOOP,
+        then: Optional[Callable] = None,
+        filter: Optional[Filter] = None
+    ):
+        self.callback = callback
+        self.event_name = event_name
+        self.pool = pool
+        self.mode = mode
+        self.then = then
+        self.filter = filter
+
+        self.calls = 0
+        self.errors = 0
+        self.dropped = 0
+        self.filtered = 0
+        self.latency = LatencyRecorder()
+
+    @property
+    def name(self) -> str:
+        return getattr(self.callback, "__qualname__", repr(self.callback))
+
+    async def run(self, bot, event_data):
+        Event.info("处理事件: {}", self.event_name)
+        self.calls += 1
+        start = time.monotonic()
+        try:
+            if self.mode == ExecutionMode.LOOP:
+                result = self.callback(bot, event_data)
+                if inspect.isawaitable(result):
+                    result = await result
+            else:
+                executor = bot.dispatcher.get_executor(self.mode)
+                result = await asyncio.get_running_loop().run_in_executor(executor, self.callback, event_data)
+            if self.then is not None:
+                await self.then(bot, event_data, result)
+        except Exception:
+            self.errors += 1
+            Event.exception(f"事件处理器 {self.name} ({self.event_name}) 发生异常")
+        finally:
+            self.latency.record(time.monotonic() - start)
+
+    def stats(self) -> dict:
+        return {
+            "handler": self.name,
+            "event": self.event_name,
+            "pool": self.pool,
+            "mode": self.mode,
+            "calls": self.calls,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "filtered": self.filtered,
+            "latency": self.latency.summary()
+        }
+
+class WorkerPool:
+    """固定数量的 worker 从有界队列中取出事件执行处理器"""
+    def __init__(self, name: str, workers: int = 64, queue_size: int = 10000, policy: str = OverflowPolicy.BLOCK):
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+        self.policy = policy
+
+        self.queues: List[asyncio.Queue] = []
+        self.in_flight = 0
+        self.dropped = 0
+        self._tasks: List[asyncio.Task] = []
+
+    def _ensure_started(self):
+        if not self.queues:
+            self.queues = [asyncio.Queue(self.queue_size)]
+            self._tasks = [asyncio.create_task(self._worker(self.queues[0])) for _ in range(self.workers)]
+
+    def _get_queue(self, event_data) -> asyncio.Queue:
+        return self.queues[0]
+
+    async def submit(self, handler: Handler, bot, event_data) -> bool:
+        """提交事件，被丢弃时返回 False"""
+        self._ensure_started()
+        queue = self._get_queue(event_data)
+        item = (handler, bot, event_data)
+        if self.policy == OverflowPolicy.BLOCK:
+            await queue.put(item)
+            return True
+        if queue.full():
+            if self.policy == OverflowPolicy.DROP:
+                self._drop(handler)
+                return False
+            oldest = queue.get_nowait()
+            queue.task_done()
+            self._drop(oldest[0])
+        queue.put_nowait(item)
+        return True
+
+    def _drop(self, handler: Handler):
+        handler.dropped += 1
+        self.dropped += 1
+        Event.warn(f"事件队列 {self.name} 已满，丢弃事件: {handler.event_name}")
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            handler, bot, event_data = await queue.get()
+            self.in_flight += 1
+            try:
+                await handler.run(bot, event_data)
+            finally:
+                self.in_flight -= 1
+                queue.task_done()
+
+    async def drain(self):
+        """等待队列中与执行中的事件全部处理完毕"""
+        await asyncio.gather(*(queue.join() for queue in self.queues))
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.queues = []
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "policy": self.policy,
+            "queued": sum(queue.qsize() for queue in self.queues),
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "dropped": self.dropped
+        }
+
+def by_channel(event_data):
+    return getattr(event_data, "channel_id", None)
+
+def by_guild(event_data):
+    return getattr(event_data, "guild_id", None)
+
+def by_author(event_data):
+    author = getattr(event_data, "author", None)
+    return getattr(author, "id", None)
+
+class KeyedWorkerPool(WorkerPool):
+    """按 key 串行执行的 worker 池
+
+    相同 key (例如 `channel_id`) 的事件总是进入同一条通道，按到达顺序依次执行；
+    不同通道之间并行执行。通道数固定，key 的数量再多也不会增加内存占用。
+    """
+    def __init__(
+        self,
+        name: str,
+        key: Callable = by_channel,
+        lanes: int = 32,
+        queue_size: int = 1000,
+        policy: str = OverflowPolicy.BLOCK
+    ):
+        super().__init__(name, lanes, queue_size, policy)
+        self.key = key
+
+    def _ensure_started(self):
+        if not self.queues:
+            self.queues = [asyncio.Queue(self.queue_size) for _ in range(self.workers)]
+            self._tasks = [asyncio.create_task(self._worker(queue)) for queue in self.queues]
+
+    def _get_queue(self, event_data) -> asyncio.Queue:
+        return self.queues[hash(self.key(event_data)) % len(self.queues)]
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["lanes"] = [queue.qsize() for queue in self.queues]
+        return stats
+
+class EventDispatcher:
+    """将事件分发到 worker 池执行
+
+    处理器注册时可以指定 worker 池，未指定时按事件类型从 `routes` 中查找，都没有时使用 `default` 池。
+    """
+    def __init__(
+        self,
+        pools: Optional[List[WorkerPool]] = None,
+        routes: Optional[Dict[str, str]] = None,
+        thread_workers: Optional[int] = None,
+        process_workers: Optional[int] = None
+    ):
+        self.pools: Dict[str, WorkerPool] = {"default": WorkerPool("default")}
+        for pool in pools or []:
+            self.pools[pool.name] = pool
+        # 事件类型 -> worker 池名称
+        self.routes = routes or {}
+
+        # 线程池与进程池在第一次使用时创建
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self._executors: Dict[str, Executor] = {}
+
+    def get_executor(self, mode: str) -> Executor:
+        executor = self._executors.get(mode)
+        if executor is None:
+            if mode == ExecutionMode.THREAD:
+                executor = ThreadPoolExecutor(self.thread_workers, thread_name_prefix="GuildBot")
+            elif mode == ExecutionMode.PROCESS:
+                executor = ProcessPoolExecutor(self.process_workers)
+            else:
+                raise ValueError(f"未知的执行模式: {mode}")
+            self._executors[mode] = executor
+        return executor
+
+    def get_pool(self, handler: Handler) -> WorkerPool:
+        name = handler.pool or self.routes.get(handler.event_name, "default")
+        if name not in self.pools:
+            raise KeyError(f"未定义的 worker 池: {name}")
+        return self.pools[name]
+
+    async def dispatch(self, bot, handlers: List[Handler], event_data):
+        for handler in handlers:
+            await self.get_pool(handler).submit(handler, bot, event_data)
+
+    async def drain(self, timeout: Optional[float] = None):
+        """等待所有执行中的事件处理器完成后停止 worker"""
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(pool.drain() for pool in self.pools.values())),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            Event.warn("等待事件处理器完成超时")
+        finally:
+            for pool in self.pools.values():
+                await pool.close()
+            for executor in self._executors.values():
+                executor.shutdown(wait=False)
+            self._executors = {}
+
+    def stats(self) -> dict:
+        return {name: pool.stats() for name, pool in self.pools.items()}
@@ -0,0 +1,79 @@
+from typing import Optional
+
+class GuildBotError(Exception):
+    """SDK 异常的基类"""
+
+class NetworkError(GuildBotError):
+    """连接失败、连接被重置或请求超时"""
+    def __init__(self, method: str, endpoint: str, error: BaseException):
+        super().__init__(f"{method} {endpoint} 请求失败: {error!r}")
+        self.method = method
+        self.endpoint = endpoint
+        self.error = error
+
+class DecodeError(GuildBotError):
+    """响应内容不是合法的 JSON"""
+    def __init__(self, endpoint: str, data: bytes):
+        super().__init__(f"{endpoint} 返回了无法解析的内容: {data[:200]!r}")
+        self.endpoint = endpoint
+        self.data = data
+
+class HTTPError(GuildBotError):
+    """服务端返回了错误状态码，`code` 与 `message` 为开放平台返回的错误码与错误信息"""
+    def __init__(
+        self,
+        method: str,
+        endpoint: str,
+        status: int,
+        code: Optional[int] = None,
+        message: Optional[str] = None,
+        trace_id: Optional[str] = None
+    ):
+        super().__init__(f"{method} {endpoint} 返回状态码 {status}: {message} (code={code}, trace_id={trace_id})")
+        self.method = method
+        self.endpoint = endpoint
+        self.status = status
+        self.code = code
+        self.message = message
+        self.trace_id = trace_id
+
+class Unauthorized(HTTPError):
+    """401，鉴权失败"""
+
+class Forbidden(HTTPError):
+    """403，没有权限"""
+
+class NotFound(HTTPError):
+    """404，资源不存在"""
+
+class RateLimited(HTTPError):
+    """429，重试次数用尽后仍被限流"""
+    def __init__(self, *args, retry_after: Optional[float] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_after = retry_after
+
+class ServerError(HTTPError):
+    """5xx，服务端错误"""
+
+_STATUS_ERRORS = {
+    401: Unauthorized,
+    403: Forbidden,
+    404: NotFound,
+    429: RateLimited
+}
+
+def http_error(method: str, endpoint: str, status: int, headers, body) -> HTTPError:
+    """根据响应状态码与响应内容 (已解析的 JSON 或 None) 创建对应的异常"""
+    cls = _STATUS_ERRORS.get(status, ServerError if status >= 500 else HTTPError)
+    code = message = None
+    if isinstance(body, dict):
+        code = body.get("code")
+        message = body.get("message")
+    return cls(method, endpoint, status, code, message, headers.get("X-Tps-trace-ID"))
+
+class CircuitOpen(GuildBotError):
+    """路由的熔断器处于打开状态，请求没有发出"""
+    def __init__(self, route: str, retry_after: float):
+        super().__init__(f"{route} 已熔断，{retry_after:.2f} 秒后恢复探测")
+        self.route = route
+        self.retry_after = retry_after
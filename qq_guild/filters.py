@@ -0,0 +1,167 @@
+import re
+
+from typing import Callable, Hashable, Iterable, Optional
+
+# 消息开头的 @ 机器人，例如 `<@!1234567>`
+_MENTION = re.compile(r"^(\s*<@!?\d+>)+\s*")
+
+def strip_mention(content: str) -> str:
+    """去掉消息开头的 @"""
+    match = _MENTION.match(content)
+    return content[match.end():] if match else content
+
+class Filter:
+    """作用于原始事件内容 (dict) 的过滤条件，在解析为模型之前执行
+
+    同一事件中 `key` 相同的过滤条件只计算一次，结果由所有事件处理器共用。
+    过滤条件可以用 `&`、`|`、`~` 组合。
+    """
+    __slots__ = ("key",)
+
+    def __init__(self, key: Hashable):
+        self.key = key
+
+    def test(self, data: dict) -> bool:
+        raise NotImplementedError
+
+    def evaluate(self, data: dict, cache: dict) -> bool:
+        result = cache.get(self.key)
+        if result is None:
+            result = cache[self.key] = self.test(data)
+        return result
+
+    def __and__(self, other: "Filter") -> "Filter":
+        return AllOf(self, other)
+
+    def __or__(self, other: "Filter") -> "Filter":
+        return AnyOf(self, other)
+
+    def __invert__(self) -> "Filter":
+        return Not(self)
+
+    def __repr__(self):
+        return f"Filter{self.key!r}"
+
+class AllOf(Filter):
+    __slots__ = ("filters",)
+
+    def __init__(self, *filters: Filter):
+        super().__init__(("all",) + tuple(f.key for f in filters))
+        self.filters = filters
+
+    def evaluate(self, data: dict, cache: dict) -> bool:
+        return all(f.evaluate(data, cache) for f in self.filters)
+
+class AnyOf(Filter):
+    __slots__ = ("filters",)
+
+    def __init__(self, *filters: Filter):
+        super().__init__(("any",) + tuple(f.key for f in filters))
+        self.filters = filters
+
+    def evaluate(self, data: dict, cache: dict) -> bool:
+        return any(f.evaluate(data, cache) for f in self.filters)
+
+class Not(Filter):
+    __slots__ = ("filter",)
+
+    def __init__(self, filter: Filter):
+        super().__init__(("not", filter.key))
+        self.filter = filter
+
+    def evaluate(self, data: dict, cache: dict) -> bool:
+        return not self.filter.evaluate(data, cache)
+
+class NotBot(Filter):
+    """忽略机器人发送的消息"""
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(("not_bot",))
+
+    def test(self, data: dict) -> bool:
+        return not (data.get("author") or {}).get("bot")
+
+class Prefix(Filter):
+    """消息内容 (去掉开头的 @ 后) 以任一前缀开头"""
+    __slots__ = ("prefixes",)
+
+    def __init__(self, *prefixes: str):
+        super().__init__(("prefix",) + prefixes)
+        self.prefixes = prefixes
+
+    def test(self, data: dict) -> bool:
+        content = data.get("content")
+        return content is not None and strip_mention(content).startswith(self.prefixes)
+
+class Contains(Filter):
+    """消息内容包含指定文本"""
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        super().__init__(("contains", text))
+        self.text = text
+
+    def test(self, data: dict) -> bool:
+        return self.text in (data.get("content") or "")
+
+class Regex(Filter):
+    """消息内容 (去掉开头的 @ 后) 匹配正则表达式"""
+    __slots__ = ("pattern",)
+
+    def __init__(self, pattern: str, flags: int = 0):
+        super().__init__(("regex", pattern, flags))
+        self.pattern = re.compile(pattern, flags)
+
+    def test(self, data: dict) -> bool:
+        content = data.get("content")
+        return content is not None and self.pattern.search(strip_mention(content)) is not None
+
+class FieldIn(Filter):
+    """事件内容的字段在指定的值中，`field` 可以用 `.` 访问嵌套字段，例如 `author.id`"""
+    __slots__ = ("path", "values")
+
+    def __init__(self, field: str, values: Iterable):
+        values = frozenset(values)
+        super().__init__(("in", field, values))
+        self.path = field.split(".")
+        self.values = values
+
+    def test(self, data: dict) -> bool:
+        for name in self.path:
+            if not isinstance(data, dict):
+                return False
+            data = data.get(name)
+        return data in self.values
+
+def GuildIn(*guild_ids: str) -> Filter:
+    """频道白名单"""
+    return FieldIn("guild_id", guild_ids)
+
+def ChannelIn(*channel_ids: str) -> Filter:
+    """子频道白名单"""
+    return FieldIn("channel_id", channel_ids)
+
+def AuthorIn(*user_ids: str) -> Filter:
+    """消息发送者白名单"""
+    return FieldIn("author.id", user_ids)
+
+class Predicate(Filter):
+    """自定义过滤函数，参数为原始事件内容；`key` 相同的函数结果共用"""
+    __slots__ = ("func",)
+
+    def __init__(self, func: Callable[[dict], bool], key: Optional[Hashable] = None):
+        super().__init__(("predicate", key if key is not None else func))
+        self.func = func
+
+    def test(self, data: dict) -> bool:
+        return bool(self.func(data))
+
+def to_filter(filters) -> Optional[Filter]:
+    """将单个过滤条件或过滤条件列表转换为 `Filter`，列表中的条件需要全部满足"""
+    if filters is None or isinstance(filters, Filter):
+        return filters
+    filters = tuple(filters)
+    if not filters:
+        return None
+    return filters[0] if len(filters) == 1 else AllOf(*filters)
@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+from .stats import LatencyRecorder
+
+class HedgePolicy:
+    """幂等 GET 请求的对冲策略
+
+    请求在该路由 `percentile` 分位的耗时内没有返回时发出第二个相同的请求，使用先成功返回的结果，另一个请求被取消。
+    路由样本不足 `min_samples` 个时不对冲；对冲请求占总请求数的比例不超过 `max_ratio`，避免故障时放大请求量。
+    """
+    # 默认对冲的路由
+    ROUTES = (
+        "GET /channels/{channel_id}",
+        "GET /channels/{channel_id}/messages/{message_id}"
+    )
+
+    def __init__(
+        self,
+        routes: Iterable[str] = ROUTES,
+        percentile: float = 95,
+        min_delay: float = 0.02,
+        max_delay: float = 2.0,
+        min_samples: int = 20,
+        max_ratio: float = 0.1
+    ):
+        self.routes = set(routes)
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.max_ratio = max_ratio
+
+        self.latency: Dict[str, LatencyRecorder] = {}
+        # 路由 -> (计算时的样本数, 对冲延迟)，样本增加 50 个后重新计算分位数
+        self._delays: Dict[str, tuple] = {}
+
+        self.requests = 0
+        self.hedged = 0
+        self.wins = 0
+
+    def delay(self, route: str) -> Optional[float]:
+        recorder = self.latency.get(route)
+        if recorder is None or recorder.count < self.min_samples:
+            return None
+        cached = self._delays.get(route)
+        if cached is None or recorder.count - cached[0] >= 50:
+            value = min(self.max_delay, max(self.min_delay, recorder.percentile(self.percentile)))
+            cached = (recorder.count, value)
+            self._delays[route] = cached
+        return cached[1]
+
+    async def _timed(self, route: str, request: Callable[[], Awaitable]):
+        start = time.monotonic()
+        result = await request()
+        recorder = self.latency.get(route)
+        if recorder is None:
+            recorder = self.latency[route] = LatencyRecorder()
+        recorder.record(time.monotonic() - start)
+        return result
+
+    async def run(self, route: str, request: Callable[[], Awaitable]):
+        self.requests += 1
+        first = asyncio.ensure_future(self._timed(route, request))
+        pending = {first}
+        try:
+            delay = self.delay(route)
+            if delay is None or self.hedged >= self.requests * self.max_ratio:
+                return await first
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return first.result()
+
+            self.hedged += 1
+            second = asyncio.ensure_future(self._timed(route, request))
+            pending.add(second)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "wins": self.wins,
+            "delays": {route: self.delay(route) for route in self.latency}
+        }
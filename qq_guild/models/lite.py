@@ -0,0 +1,207 @@
+"""`qq_guild.models.api` 的轻量实现
+
+属性名与 pydantic 模型相同，但只使用 `__slots__` 保存字段，`parse_obj` 不做类型校验与转换，
+没有实例 `__dict__` 与 `__fields_set__`，内存占用与构造耗时都更低。适合需要在内存中保留大量消息的场景；
+服务端返回的数据不符合预期时不会报错，而是原样保存。
+"""
+from typing import Dict, Tuple
+
+from .ws.base import EVENT_MODELS as _EVENT_MODELS
+from .api.audio import STATUS
+from .api.channel import ChannelSubType, ChannelType, PrivateType, SpeakPermission
+from .api.reaction import EmojiType, ReactionTargetType
+from .api.roles import DefaultRoles
+from .api.schedule import RemindType
+
+class LiteModel:
+    """不做校验的 `__slots__` 模型
+
+    子类在 `__slots__` 中声明字段，`_nested` 声明嵌套模型 (列表字段写作 `[模型]`)，`_aliases` 声明字段在数据中的名称。
+    """
+    __slots__ = ()
+    _nested: Dict[str, object] = {}
+    _aliases: Dict[str, str] = {}
+    # (字段名, 数据中的名称, 嵌套模型, 是否为列表)，定义子类时生成
+    _plan: Tuple[tuple, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        plan = []
+        for name in cls.__slots__:
+            nested = cls._nested.get(name)
+            is_list = isinstance(nested, list)
+            plan.append((name, cls._aliases.get(name, name), nested[0] if is_list else nested, is_list))
+        cls._plan = tuple(plan)
+
+    def __init__(self, **data):
+        for name, _, _, _ in self._plan:
+            setattr(self, name, data.get(name))
+
+    @classmethod
+    def parse_obj(cls, data: dict):
+        obj = cls.__new__(cls)
+        get = data.get
+        for name, key, nested, is_list in cls._plan:
+            value = get(key)
+            if nested is not None and value is not None:
+                if is_list:
+                    value = [nested.parse_obj(item) for item in value]
+                else:
+                    value = nested.parse_obj(value)
+            setattr(obj, name, value)
+        return obj
+
+    @classmethod
+    def construct(cls, **data):
+        return cls(**data)
+
+    def dict(self, by_alias: bool = False, exclude_none: bool = False) -> dict:
+        result = {}
+        for name, key, nested, is_list in self._plan:
+            value = getattr(self, name)
+            if value is None and exclude_none:
+                continue
+            if nested is not None and value is not None:
+                if is_list:
+                    value = [item.dict(by_alias, exclude_none) for item in value]
+                else:
+                    value = value.dict(by_alias, exclude_none)
+            result[key if by_alias else name] = value
+        return result
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class User(LiteModel):
+    __slots__ = ("id", "username", "avatar", "bot", "union_openid", "union_user_account")
+
+class Guild(LiteModel):
+    __slots__ = (
+        "id", "name", "icon", "owner_id", "owner", "op_user_id", "member_count", "max_members",
+        "description", "joined_at", "union_world_id", "union_org_id"
+    )
+
+class Channel(LiteModel):
+    __slots__ = ("id", "guild_id", "name", "type", "sub_type", "position", "parent_id", "owner_id")
+
+class ChannelPermissions(LiteModel):
+    __slots__ = ("channel_id", "user_id", "role_id", "permissions")
+
+class Member(LiteModel):
+    __slots__ = ("user", "nick", "roles", "joined_at")
+    _nested = {"user": User}
+
+class MemberWithGuildID(LiteModel):
+    __slots__ = ("guild_id", "user", "nick", "roles", "joined_at")
+    _nested = {"user": User}
+
+class DMS(LiteModel):
+    __slots__ = ("channel_id", "create_time")
+
+class MessageEmbedField(LiteModel):
+    __slots__ = ("name", "value")
+
+class MessageEmbed(LiteModel):
+    __slots__ = ("title", "description", "prompt", "timestamp", "Fields")
+    _nested = {"Fields": [MessageEmbedField]}
+    _aliases = {"Fields": "fields"}
+
+class MessageAttachment(LiteModel):
+    __slots__ = ("url",)
+
+class MessageArkObjKv(LiteModel):
+    __slots__ = ("key", "value")
+
+class MessageArkObj(LiteModel):
+    __slots__ = ("obj",)
+    _nested = {"obj": [MessageArkObjKv]}
+
+class MessageArk(LiteModel):
+    __slots__ = ("template_id", "kv")
+    _nested = {"kv": [MessageArkObj]}
+
+class Message(LiteModel):
+    __slots__ = (
+        "id", "channel_id", "guild_id", "content", "timestamp", "edited_timestamp", "mention_everyone",
+        "author", "attachments", "embeds", "mentions", "member", "ark"
+    )
+    _nested = {
+        "author": User,
+        "attachments": [MessageAttachment],
+        "embeds": [MessageEmbed],
+        "mentions": [User],
+        "member": Member,
+        "ark": MessageArk
+    }
+
+class MessageAudited(LiteModel):
+    __slots__ = ("audit_id", "message_id", "guild_id", "channel_id", "audit_time", "create_time")
+
+class AudioAction(LiteModel):
+    __slots__ = ("guild_id", "channel_id", "audio_url", "text")
+
+class AudioControl(LiteModel):
+    __slots__ = ("audio_url", "text", "status")
+
+class Announces(LiteModel):
+    __slots__ = ("guild_id", "channel_id", "message_id")
+
+class Role(LiteModel):
+    __slots__ = ("id", "name", "color", "hoist", "number", "member_limit")
+
+class RoleRequest(LiteModel):
+    __slots__ = ("guild_id", "roles", "role_num_limit")
+    _nested = {"roles": [Role]}
+
+class RolesFilter(LiteModel):
+    __slots__ = ("name", "color", "hoist")
+
+class RolesInfo(LiteModel):
+    __slots__ = ("name", "color", "hoist")
+
+class Schedule(LiteModel):
+    __slots__ = (
+        "id", "name", "description", "start_timestamp", "end_timestamp", "creator", "jump_channel_id", "remind_type"
+    )
+    _nested = {"creator": Member}
+
+class ReactionTarget(LiteModel):
+    __slots__ = ("id", "type")
+
+class Emoji(LiteModel):
+    __slots__ = ("id", "type")
+
+class MessageReaction(LiteModel):
+    __slots__ = ("user_id", "guild_id", "channel_id", "target", "emoji")
+    _nested = {"target": ReactionTarget, "emoji": Emoji}
+
+# READY 等 Gateway 事件仍使用 pydantic 模型
+EVENT_MODELS = dict(_EVENT_MODELS)
+EVENT_MODELS.update({
+    "GUILD_CREATE": Guild,
+    "GUILD_UPDATE": Guild,
+    "GUILD_DELETE": Guild,
+    "CHANNEL_CREATE": Channel,
+    "CHANNEL_UPDATE": Channel,
+    "CHANNEL_DELETE": Channel,
+    "GUILD_MEMBER_ADD": MemberWithGuildID,
+    "GUILD_MEMBER_UPDATE": MemberWithGuildID,
+    "GUILD_MEMBER_REMOVE": MemberWithGuildID,
+    "MESSAGE_CREATE": Message,
+    "AT_MESSAGE_CREATE": Message,
+    "DIRECT_MESSAGE_CREATE": Message,
+    "MESSAGE_AUDIT_PASS": MessageAudited,
+    "MESSAGE_AUDIT_REJECT": MessageAudited,
+    "MESSAGE_REACTION_ADD": MessageReaction,
+    "MESSAGE_REACTION_REMOVE": MessageReaction,
+    "AUDIO_START": AudioAction,
+    "AUDIO_FINISH": AudioAction,
+    "AUDIO_ON_MIC": AudioAction,
+    "AUDIO_OFF_MIC": AudioAction
+})
@@ -1,3 +1,3 @@
-from .base import Load
+from .base import Load, EVENT_MODELS, parse_event
 from .authorization import Properties, Authorization, Resumed, Intents
-from .opcode import opcode
\ No newline at end of file
+from .opcode import opcode
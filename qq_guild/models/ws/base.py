@@ -1,11 +1,10 @@
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Type
 
 from pydantic import BaseModel
 
 from qq_guild.models.api.reaction import MessageReaction
 
 from ..api import AudioAction, Channel, Guild, MemberWithGuildID, Message, MessageAudited
-from .authorization import Authorization
 from .ready import Ready
 
 class HeartBeat(BaseModel):
@@ -13,7 +12,39 @@ class HeartBeat(BaseModel):
 
 class Load(BaseModel):
     op: int
-    d: Optional[
-        Union[int, str, Ready, HeartBeat, Authorization, Guild, Message, Channel, MemberWithGuildID, AudioAction, MessageAudited, MessageReaction]]
+    # 事件内容按 `t` 通过 EVENT_MODELS 延迟解析
+    d: Optional[Any]
     s: Optional[int]
     t: Optional[str]
+
+# 事件类型 -> 事件内容模型
+EVENT_MODELS: Dict[str, Type[BaseModel]] = {
+    "READY": Ready,
+    "GUILD_CREATE": Guild,
+    "GUILD_UPDATE": Guild,
+    "GUILD_DELETE": Guild,
+    "CHANNEL_CREATE": Channel,
+    "CHANNEL_UPDATE": Channel,
+    "CHANNEL_DELETE": Channel,
+    "GUILD_MEMBER_ADD": MemberWithGuildID,
+    "GUILD_MEMBER_UPDATE": MemberWithGuildID,
+    "GUILD_MEMBER_REMOVE": MemberWithGuildID,
+    "MESSAGE_CREATE": Message,
+    "AT_MESSAGE_CREATE": Message,
+    "DIRECT_MESSAGE_CREATE": Message,
+    "MESSAGE_AUDIT_PASS": MessageAudited,
+    "MESSAGE_AUDIT_REJECT": MessageAudited,
+    "MESSAGE_REACTION_ADD": MessageReaction,
+    "MESSAGE_REACTION_REMOVE": MessageReaction,
+    "AUDIO_START": AudioAction,
+    "AUDIO_FINISH": AudioAction,
+    "AUDIO_ON_MIC": AudioAction,
+    "AUDIO_OFF_MIC": AudioAction
+}
+
+def parse_event(t: str, d, models: Dict[str, Type] = EVENT_MODELS):
+    """根据事件类型解析事件内容，未知事件返回原始数据"""
+    model = models.get(t)
+    if model is None or not isinstance(d, dict):
+        return d
+    return model.parse_obj(d)
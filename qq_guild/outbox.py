@@ -0,0 +1,267 @@
+import asyncio
+import itertools
+import os
+import time
+
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from .codec import default_codec
+from .errors import GuildBotError, NetworkError
+from .logger import Network
+
+class OutboxItem:
+    """发件箱中等待发送的一条消息，合并后的消息与重复的消息共享同一个 future"""
+    __slots__ = ("id", "channel_id", "data", "keys", "future", "created_at", "attempts")
+
+    def __init__(self, item_id: int, channel_id: str, data: dict, future: Optional[asyncio.Future] = None):
+        self.id = item_id
+        self.channel_id = channel_id
+        self.data = data
+        # 已合并到该消息中的原始消息，用于去重
+        self.keys = {_message_key(data)}
+        self.future = future
+        self.created_at = time.monotonic()
+        self.attempts = 0
+
+    @property
+    def plain(self) -> bool:
+        return self.data.keys() <= {"msg_id", "content"} and self.data.get("content") is not None
+
+def _message_key(data: dict):
+    return default_codec.dumps(data)
+
+class Outbox:
+    """按子频道排队发送消息的发件箱
+
+    同一子频道的消息按顺序发送，每条消息最多等待 `window` 秒。等待期间，`msg_id` 相同的相邻纯文本消息
+    会用 `separator` 合并为一条 (合并后不超过 `max_length` 个字符)，与队列中完全相同的消息会被丢弃。
+    子频道的发消息路由被限流时队列暂停发送，期间到达的消息继续合并，限流解除后再发送。
+
+    网络错误时消息按 `window` 的指数退避重试，共尝试 `max_attempts` 次后以该错误结束 future。
+
+    指定 `path` 时待发送的消息会追加写入该文件，重启后未发送的消息会被重新发送。`close` 时仍未发送的消息的 future
+    以异常结束，指定了 `path` 的消息仍保留在文件中。
+    集群模式下每个工作进程使用单独的文件，见 `for_worker`。
+    """
+    def __init__(
+        self,
+        window: float = 0.2,
+        max_length: int = 2000,
+        separator: str = "\n",
+        path: Optional[str] = None,
+        max_attempts: int = 3
+    ):
+        self.window = window
+        self.max_length = max_length
+        self.separator = separator
+        self.path = path
+        self.max_attempts = max_attempts
+        self.protocol = None
+
+        self.queues: Dict[str, Deque[OutboxItem]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._ids = itertools.count()
+        self._flush_now = asyncio.Event()
+        self._journal = None
+
+        self.queued = 0
+        self.merged = 0
+        self.deduplicated = 0
+        self.sent = 0
+        self.failed = 0
+
+        if path is not None:
+            self._load()
+
+    def bind(self, protocol):
+        self.protocol = protocol
+
+    def for_worker(self, worker_id: int):
+        """集群模式下由工作进程调用，改为使用该进程单独的文件，避免多个进程交错写入同一个文件
+
+        主进程在 fork 前关闭发件箱，此时队列应为空；工作进程重启后从自己的文件恢复未发送的消息。
+        """
+        if self.queues or self._tasks:
+            raise GuildBotError("发件箱仍有待发送的消息，不能切换到工作进程的文件")
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self._flush_now = asyncio.Event()
+        if self.path is not None:
+            root, ext = os.path.splitext(self.path)
+            self.path = f"{root}.{worker_id}{ext}"
+            self._load()
+
+    def _load(self):
+        """读取未发送的消息并压缩文件"""
+        pending: Dict[int, OutboxItem] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for line in f:
+                    try:
+                        record = default_codec.loads(line)
+                    except ValueError:
+                        # 写入时中断的最后一行
+                        continue
+                    if "data" in record:
+                        pending[record["id"]] = OutboxItem(record["id"], record["channel_id"], record["data"])
+                    else:
+                        pending.pop(record["id"], None)
+        for item in pending.values():
+            self.queues.setdefault(item.channel_id, deque()).append(item)
+        self._ids = itertools.count(max(pending, default=-1) + 1)
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            for item in pending.values():
+                f.write(self._record(item) + "\n")
+        self._journal = open(self.path, "a", encoding="utf-8")
+        if pending:
+            Network.info(f"发件箱恢复了 {len(pending)} 条未发送的消息")
+
+    def _record(self, item: OutboxItem) -> str:
+        return default_codec.dumps({"id": item.id, "channel_id": item.channel_id, "data": item.data})
+
+    def _write(self, line: str):
+        if self._journal is not None:
+            self._journal.write(line + "\n")
+            self._journal.flush()
+
+    def start(self):
+        """开始发送从文件中恢复的消息"""
+        for channel_id in self.queues:
+            self._schedule(channel_id)
+
+    def _schedule(self, channel_id: str):
+        if channel_id not in self._tasks:
+            self._tasks[channel_id] = asyncio.ensure_future(self._flush_channel(channel_id))
+
+    def put(self, channel_id: str, data: dict) -> asyncio.Future:
+        """将消息加入队列，返回发送结果的 future"""
+        queue = self.queues.setdefault(channel_id, deque())
+        key = _message_key(data)
+        for item in queue:
+            if key in item.keys and item.future is not None:
+                self.deduplicated += 1
+                return item.future
+
+        last = queue[-1] if queue else None
+        content = data.get("content")
+        if (
+            last is not None and last.future is not None and last.plain
+            and data.keys() <= {"msg_id", "content"} and content is not None
+            and last.data.get("msg_id") == data.get("msg_id")
+            and len(last.data["content"]) + len(self.separator) + len(content) <= self.max_length
+        ):
+            last.data["content"] += self.separator + content
+            last.keys.add(key)
+            self.merged += 1
+            self._write(self._record(last))
+            return last.future
+
+        item = OutboxItem(next(self._ids), channel_id, data, asyncio.get_running_loop().create_future())
+        queue.append(item)
+        self.queued += 1
+        self._write(self._record(item))
+        self._schedule(channel_id)
+        return item.future
+
+    async def _sleep(self, delay: float):
+        try:
+            await asyncio.wait_for(self._flush_now.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _flush_channel(self, channel_id: str):
+        queue = self.queues[channel_id]
+        bucket = self.protocol.ratelimiter.get_bucket("POST", f"/channels/{channel_id}/messages")
+        try:
+            while queue:
+                item = queue[0]
+                delay = item.created_at + self.window - time.monotonic()
+                if delay > 0 and not self._flush_now.is_set():
+                    await self._sleep(delay)
+                # 路由被限流时继续等待，期间到达的消息会合并到队列中
+                delay = bucket.delay()
+                while delay > 0 and not self._flush_now.is_set():
+                    await self._sleep(delay)
+                    delay = bucket.delay()
+                queue.popleft()
+                try:
+                    sent = await self._send(item)
+                except asyncio.CancelledError:
+                    queue.appendleft(item)
+                    raise
+                if not sent:
+                    # 网络错误，放回队首并退避后重试，期间到达的消息仍可以合并
+                    queue.appendleft(item)
+                    await asyncio.sleep(self.window * 2 ** (item.attempts - 1))
+        finally:
+            self._tasks.pop(channel_id, None)
+            if not queue:
+                self.queues.pop(channel_id, None)
+
+    async def _send(self, item: OutboxItem) -> bool:
+        """发送消息，网络错误且还可以重试时返回 False"""
+        item.attempts += 1
+        try:
+            result = await self.protocol._post(f"/channels/{item.channel_id}/messages", item.data)
+        except NetworkError as e:
+            if item.attempts < self.max_attempts:
+                Network.warn(f"发件箱发送到子频道 {item.channel_id} 失败 (第 {item.attempts} 次): {e!r}")
+                return False
+            Network.error(f"发件箱发送到子频道 {item.channel_id} 失败 {item.attempts} 次，放弃发送: {e!r}")
+            self._fail(item, e)
+            return True
+        except Exception as e:
+            self._fail(item, e)
+            return True
+        self.sent += 1
+        self._done(item)
+        if item.future is not None and not item.future.done():
+            item.future.set_result(result)
+        return True
+
+    def _fail(self, item: OutboxItem, error: BaseException):
+        self.failed += 1
+        self._done(item)
+        if item.future is not None and not item.future.done():
+            item.future.set_exception(error)
+
+    def _done(self, item: OutboxItem):
+        self._write(default_codec.dumps({"id": item.id}))
+
+    async def flush(self):
+        """立即发送队列中的所有消息"""
+        self._flush_now.set()
+        try:
+            self.start()
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        finally:
+            self._flush_now.clear()
+
+    async def close(self):
+        await self.flush()
+        # 正常情况下 flush 后队列为空，仍有消息时 (例如 flush 被取消) 结束其 future，避免调用方一直等待
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        for queue in self.queues.values():
+            for item in queue:
+                if item.future is not None and not item.future.done():
+                    item.future.set_exception(GuildBotError(f"发件箱已关闭，消息未发送到子频道 {item.channel_id}"))
+        self.queues = {}
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": sum(len(queue) for queue in self.queues.values()),
+            "channels": len(self.queues),
+            "queued": self.queued,
+            "merged": self.merged,
+            "deduplicated": self.deduplicated,
+            "sent": self.sent,
+            "failed": self.failed
+        }
@@ -1,73 +1,225 @@
 import aiohttp
-import json
-from typing import Union
+import asyncio
+from typing import AsyncIterator, Iterable, Optional, Union
 
 from .models import *
+from .models import api, lite
 from .logger import Network
+from .breaker import CircuitBreakers
+from .bulk import BulkResult, run_bulk
+from .cache import MessageHistory, RequestCoalescer, StateCache
+from .codec import JSONCodec, default_codec
+from .errors import CircuitOpen, DecodeError, NetworkError, http_error
+from .hedge import HedgePolicy
+from .outbox import Outbox
+from .ratelimit import RateLimiter, route_template
+from .retry import RetryPolicy
+from .template import MessageTemplate
+
+# 获取频道成员列表时单页的最大数量
+MEMBER_PAGE_LIMIT = 400
+
+def _mute_data(mute_end_timestamp: Optional[int], mute_seconds: Optional[int]) -> dict:
+    if mute_end_timestamp is not None:
+        return {"mute_end_timestamp": str(mute_end_timestamp)}
+    if mute_seconds is not None:
+        return {"mute_seconds": str(mute_seconds)}
+    raise ValueError("mute_end_timestamp, mute_seconds 参数必选其一")
 
 class GuildBotProtocol:
-    async def _post(self, endpoint, data_map=None):
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.url}{endpoint}", json=data_map, headers={
-                'Authorization': self.token,
-                'Content-Type': 'application/json'
-            }) as response:
-                data = await response.text(encoding="utf-8")
-                response.raise_for_status()
-        Network.debug(f"POST {endpoint} 返回结果: {data}")
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 0,
+        keepalive_timeout: float = 30,
+        dns_cache_ttl: int = 300,
+        connect_timeout: Optional[float] = 10,
+        read_timeout: Optional[float] = 30,
+        total_timeout: Optional[float] = 60,
+        retry_policy: Optional[RetryPolicy] = None,
+        breakers: Optional[CircuitBreakers] = None,
+        hedging: Optional[HedgePolicy] = None,
+        ratelimiter: Optional[RateLimiter] = None,
+        codec: Optional[JSONCodec] = None,
+        state: Optional[StateCache] = None,
+        history: Optional[MessageHistory] = None,
+        coalescer: Optional[RequestCoalescer] = None,
+        models: str = "pydantic",
+        outbox: Optional[Outbox] = None
+    ):
+        self.url = url
+        self.token = token
+
+        # 连接池配置，所有 REST 请求共用同一个 ClientSession
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self._client_session: Optional[aiohttp.ClientSession] = None
+        # 单次请求的超时时间，重试的每次请求分别计时
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, sock_connect=connect_timeout, sock_read=read_timeout)
+
+        self.ratelimiter = ratelimiter or RateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        # 可选的按路由桶熔断与 GET 请求对冲
+        self.breakers = breakers
+        self.hedging = hedging
+        # Gateway 与 REST 共用的 JSON 编解码器
+        self.codec = codec or default_codec
+        # 可选的频道、子频道与成员缓存
+        self.state = state
+        # 可选的最近消息缓存
+        self.history = history
+        # 合并相同的并发 GET 请求
+        self.coalescer = coalescer or RequestCoalescer()
+        # REST 返回值与事件内容使用的模型，"lite" 为不做校验的 __slots__ 模型 (qq_guild.models.lite)
+        if models not in ("pydantic", "lite"):
+            raise ValueError(f"未知的模型类型: {models}")
+        self.models = lite if models == "lite" else api
+        if state is not None:
+            state.bind(self.models)
+        # 可选的发件箱，启用后 send_message 按子频道排队、合并与去重
+        self.outbox = outbox
+        if outbox is not None:
+            outbox.bind(self)
+
+    @property
+    def _headers(self):
+        return {
+            'Authorization': self.token,
+            'Content-Type': 'application/json'
+        }
+
+    async def _get_client_session(self) -> aiohttp.ClientSession:
+        """获取共享的 ClientSession，不存在或已关闭时重新创建"""
+        if self._client_session is None or self._client_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl
+            )
+            self._client_session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._client_session
+
+    async def close(self):
+        """发送发件箱中剩余的消息并关闭共享的 ClientSession"""
+        if self.outbox is not None:
+            await self.outbox.close()
+        if self._client_session is not None and not self._client_session.closed:
+            await self._client_session.close()
+        self._client_session = None
+
+    async def _request(self, method, endpoint, params=None, data_map=None, idempotent=None, body=None):
+        """发送请求，失败时抛出 `qq_guild.errors` 中的异常
+
+        被限流时等待后重试；连接错误、超时与 5xx 按 `retry_policy` 重试，`idempotent` 可以声明 POST 请求是否幂等。
+        启用熔断时每次请求前检查路由桶的熔断器，熔断器打开时抛出 `CircuitOpen`。
+        `body` 为已编码的请求体，例如 `MessageTemplate.render` 的结果。
+        """
+        session = await self._get_client_session()
+        if body is None and data_map is not None:
+            body = self.codec.dumps_bytes(data_map)
+        bucket = self.ratelimiter.get_bucket(method, endpoint)
+        policy = self.retry_policy
+        breaker = self.breakers.get(bucket.key) if self.breakers is not None else None
+        retryable = policy.is_idempotent(method, bucket.key, idempotent)
+        policy.on_request()
+        throttled = 0
+        attempt = 0
+        while True:
+            if breaker is not None and not breaker.allow():
+                raise CircuitOpen(bucket.key, breaker.retry_after())
+            try:
+                async with self.ratelimiter.acquire(bucket):
+                    async with session.request(method, f"{self.url}{endpoint}", params=params, data=body, headers=self._headers) as response:
+                        data = await response.read()
+                    retry_after = self.ratelimiter.update(bucket, response.status, response.headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if breaker is not None:
+                    breaker.record(False)
+                # 连接没有建立时请求一定没有发出，非幂等请求也可以重试
+                delay = policy.backoff(attempt) if retryable or isinstance(e, aiohttp.ClientConnectorError) else None
+                if delay is None:
+                    raise NetworkError(method, endpoint, e) from e
+                attempt += 1
+                Network.warn(f"{method} {endpoint} 请求失败: {e!r}，{delay:.2f} 秒后重试")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                if breaker is not None:
+                    breaker.release()
+                raise
+            if breaker is not None:
+                breaker.record(response.status < 500)
+
+            if retry_after is not None and throttled < self.ratelimiter.max_retries:
+                throttled += 1
+                Network.warn(f"{method} {endpoint} 触发频率限制，{retry_after:.2f} 秒后重试")
+                continue
+            if response.status < 400:
+                return response, data
+
+            error = http_error(method, endpoint, response.status, response.headers, self._try_decode(data))
+            if retry_after is not None:
+                error.retry_after = retry_after
+            elif retryable and response.status in policy.retry_statuses:
+                delay = policy.backoff(attempt)
+                if delay is not None:
+                    attempt += 1
+                    Network.warn(f"{method} {endpoint} 返回状态码 {response.status}，{delay:.2f} 秒后重试")
+                    await asyncio.sleep(delay)
+                    continue
+            raise error
+
+    def _try_decode(self, data: bytes):
         try:
-            return json.loads(data)
-        except json.decoder.JSONDecodeError:
-            return False
-
-    async def _get(self, endpoint, params=None): 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.url}{endpoint}", params=params, headers={
-                'Authorization': self.token,
-                'Content-Type': 'application/json'
-            }) as response:
-                response.raise_for_status()
-                data = await response.text(encoding="utf-8")
-        Network.debug(f"GET {endpoint} 返回结果: {data}")
+            return self.codec.loads(data) if data else None
+        except ValueError:
+            return None
+
+    def _decode(self, endpoint, data: bytes):
+        """解析响应内容，没有内容时返回 None"""
+        if not data:
+            return None
         try:
-            return json.loads(data)
-        except json.decoder.JSONDecodeError:
-            return False
+            return self.codec.loads(data)
+        except ValueError:
+            raise DecodeError(endpoint, data) from None
+
+    async def _post(self, endpoint, data_map=None, idempotent=None, body=None):
+        _, data = await self._request("POST", endpoint, data_map=data_map, idempotent=idempotent, body=body)
+        Network.debug("POST {} 返回结果: {}", endpoint, data)
+        return self._decode(endpoint, data)
+
+    async def _get(self, endpoint, params=None):
+        key = (endpoint, tuple(sorted(params.items())) if params else None)
+        return await self.coalescer.get(key, route_template(endpoint), lambda: self._fetch(endpoint, params))
+
+    async def _fetch(self, endpoint, params=None):
+        route = f"GET {route_template(endpoint)}"
+        if self.hedging is not None and route in self.hedging.routes:
+            _, data = await self.hedging.run(route, lambda: self._request("GET", endpoint, params=params))
+        else:
+            _, data = await self._request("GET", endpoint, params=params)
+        Network.debug("GET {} 返回结果: {}", endpoint, data)
+        return self._decode(endpoint, data)
     
     async def _patch(self, endpoint, data_map=None):
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(f"{self.url}{endpoint}", json=data_map, headers={
-                'Authorization': self.token,
-                'Content-Type': 'application/json'
-            }) as response:
-                data = await response.text(encoding="utf-8")
-                response.raise_for_status()
-        Network.debug(f"PATCH {endpoint} 返回结果: {data}")
-        try:
-            return json.loads(data)
-        except json.decoder.JSONDecodeError:
-            return False
+        _, data = await self._request("PATCH", endpoint, data_map=data_map)
+        Network.debug("PATCH {} 返回结果: {}", endpoint, data)
+        return self._decode(endpoint, data)
     
     async def _delete(self, endpoint, data_map=None):
-        async with aiohttp.ClientSession() as session:
-            async with session.delete(f"{self.url}{endpoint}", json=data_map, headers={
-                'Authorization': self.token,
-                'Content-Type': 'application/json'
-            }) as response:
-                Network.debug(f"DELETE {endpoint} 返回状态码: {response.status}")
-                if response.status != 204:
-                    return False
+        response, _ = await self._request("DELETE", endpoint, data_map=data_map)
+        Network.debug("DELETE {} 返回状态码: {}", endpoint, response.status)
         return True
     
     async def _put(self, endpoint, data_map=None):
-        async with aiohttp.ClientSession() as session:
-            async with session.put(f"{self.url}{endpoint}", json=data_map, headers={
-                'Authorization': self.token,
-                'Content-Type': 'application/json'
-            }) as response:
-                Network.debug(f"PUT {endpoint} 返回状态码: {response.status}")
-                if response.status != 204:
-                    return False
+        response, _ = await self._request("PUT", endpoint, data_map=data_map)
+        Network.debug("PUT {} 返回状态码: {}", endpoint, response.status)
         return True
 
     async def _get_gateway_url(self) -> str:
@@ -86,20 +238,27 @@ class GuildBotProtocol:
     async def get_me(self) -> User:
         """获取机器人的信息"""
         result = await self._get(f"/users/@me")
-        return User.parse_obj(result)
+        return self.models.User.parse_obj(result)
 
     async def get_guild_list(self) -> List[Guild]:
         """获取机器人加入的频道列表"""
         result = await self._get("/users/@me/guilds")
-        return [Guild.parse_obj(_guild) for _guild in result]
+        return [self.models.Guild.parse_obj(_guild) for _guild in result]
 
     '''
     频道 API
     '''
     async def get_guild_info(self, guild_id: str):
         """获取频道信息"""
+        if self.state is not None:
+            guild = self.state.get_guild(guild_id)
+            if guild is not None:
+                return guild
         result = await self._get(f"/guilds/{guild_id}")
-        return Guild.parse_obj(result)
+        guild = self.models.Guild.parse_obj(result)
+        if self.state is not None:
+            self.state.set_guild(guild)
+        return guild
 
     '''
     子频道 API
@@ -107,12 +266,19 @@ class GuildBotProtocol:
     async def get_guild_channel_list(self, guild_id: str) -> List[Channel]:
         """获取频道下的子频道列表"""
         result = await self._get(f"/guilds/{guild_id}/channels")
-        return [Channel.parse_obj(_channel) for _channel in result]
+        return [self.models.Channel.parse_obj(_channel) for _channel in result]
 
     async def get_channel(self, channel_id: str) -> Channel:
         """获取子频道信息"""
+        if self.state is not None:
+            channel = self.state.get_channel(channel_id)
+            if channel is not None:
+                return channel
         result = await self._get(f"/channels/{channel_id}")
-        return Channel.parse_obj(result)
+        channel = self.models.Channel.parse_obj(result)
+        if self.state is not None:
+            self.state.set_channel(channel)
+        return channel
 
     async def create_channel(
         self,
@@ -137,7 +303,10 @@ class GuildBotProtocol:
             "speak_permission": speak_permission,
             "application_id": application_id
         })
-        return Channel.parse_obj(result)
+        channel = self.models.Channel.parse_obj(result)
+        if self.state is not None:
+            self.state.set_channel(channel)
+        return channel
 
     async def edit_channel(
         self,
@@ -158,11 +327,17 @@ class GuildBotProtocol:
             "private_type": private_type,
             "speak_permission": speak_permission
         })
-        return Channel.parse_obj(result)
+        channel = self.models.Channel.parse_obj(result)
+        if self.state is not None:
+            self.state.set_channel(channel)
+        return channel
 
-    async def edit_channel(self, channel_id: str) -> bool:
+    async def delete_channel(self, channel_id: str) -> bool:
         """删除子频道"""
-        return await self._delete(f"/channels/{channel_id}")
+        result = await self._delete(f"/channels/{channel_id}")
+        if self.state is not None:
+            self.state.remove_channel(channel_id)
+        return result
 
     '''
     成员 API
@@ -173,24 +348,81 @@ class GuildBotProtocol:
             "after": after,
             "limit": limit
         })
-        return [Member.parse_obj(_member) for _member in result]
+        return [self.models.Member.parse_obj(_member) for _member in result]
+
+    async def iter_members(self, guild_id: str, limit: int = MEMBER_PAGE_LIMIT, prefetch: bool = True) -> AsyncIterator[Member]:
+        """遍历频道的全部成员，自动按 `after` 翻页，`prefetch` 为 True 时在处理当前页的同时获取下一页
+
+        翻页时接口可能返回上一页已经返回过的成员，这些成员会被跳过；内存中只保留当前页与下一页。
+        """
+        after = "0"
+        seen = set()
+        next_page = asyncio.ensure_future(self.get_member_list(guild_id, after, limit))
+        try:
+            while next_page is not None:
+                page = await next_page
+                next_page = None
+                if not page:
+                    return
+                last = page[-1].user.id if page[-1].user is not None else None
+                # 最后一个成员与当前游标相同时没有进展，两种模式都在这一页之后停止
+                progressed = last is not None and last != after
+                if progressed:
+                    after = last
+                    if prefetch:
+                        next_page = asyncio.ensure_future(self.get_member_list(guild_id, after, limit))
+
+                page_ids = set()
+                for member in page:
+                    user_id = member.user.id if member.user is not None else None
+                    page_ids.add(user_id)
+                    if user_id in seen:
+                        continue
+                    if self.state is not None:
+                        self.state.set_member(guild_id, member)
+                    yield member
+                seen = page_ids
+
+                if not prefetch and progressed:
+                    next_page = asyncio.ensure_future(self.get_member_list(guild_id, after, limit))
+        finally:
+            if next_page is not None:
+                next_page.cancel()
 
     async def get_member(self, guild_id: str, user_id: str) -> Member:
         """获取指定频道中成员的信息"""
+        if self.state is not None:
+            member = self.state.get_member(guild_id, user_id)
+            if member is not None:
+                return member
         result = await self._get(f"/guilds/{guild_id}/members/{user_id}")
-        return Member.parse_obj(result)
+        member = self.models.Member.parse_obj(result)
+        if self.state is not None:
+            self.state.set_member(guild_id, member)
+        return member
 
     async def delete_member(self, guild_id: str, user_id: str) -> bool:
         """删除频道成员"""
-        return await self._delete(f"/guilds/{guild_id}/members/{user_id}")
+        result = await self._delete(f"/guilds/{guild_id}/members/{user_id}")
+        if self.state is not None:
+            self.state.remove_member(guild_id, user_id)
+        return result
+
+    def bulk_delete_member(self, guild_id: str, user_ids: Iterable[str], concurrency: int = 10, retries: int = 0, retry_delay: float = 1.0) -> AsyncIterator[BulkResult]:
+        """批量删除频道成员，按完成顺序返回每个成员的结果"""
+        return run_bulk(lambda user_id: self.delete_member(guild_id, user_id), user_ids, concurrency, retries, retry_delay, self.retry_policy)
 
     '''
     消息 API
     '''
     async def get_message(self, channel_id: str, message_id: str) -> Message:
         """获取指定子频道的消息"""
+        if self.history is not None:
+            message = self.history.get(message_id)
+            if message is not None and message.channel_id == channel_id:
+                return message
         result = await self._get(f"/channels/{channel_id}/messages/{message_id}")
-        return Message.parse_obj(result)
+        return self.models.Message.parse_obj(result)
 
     async def send_message(
         self,
@@ -210,13 +442,25 @@ class GuildBotProtocol:
         if content is not None:
             data["content"] = content
         if embed is not None:
-            data["embed"] = embed.dict(exclude_none=True)
+            data["embed"] = embed.dict(by_alias=True, exclude_none=True)
         if ark is not None:
             data["ark"] = ark.dict(exclude_none=True)
         if image is not None:
             data["image"] = image
-        result = await self._post(f"/channels/{channel_id}/messages", data)
-        return Message.parse_obj(result)
+        if self.outbox is not None:
+            result = await self.outbox.put(channel_id, data)
+        else:
+            result = await self._post(f"/channels/{channel_id}/messages", data)
+        return self.models.Message.parse_obj(result)
+
+    async def send_template(self, channel_id, template: MessageTemplate, message_id: Union[str, None] = None, **fields) -> Message:
+        """使用消息模板向子频道发送消息，`fields` 为模板占位符的值"""
+        body = template.render(message_id, **fields)
+        if self.outbox is not None:
+            result = await self.outbox.put(channel_id, self.codec.loads(body))
+        else:
+            result = await self._post(f"/channels/{channel_id}/messages", body=body)
+        return self.models.Message.parse_obj(result)
 
     '''
     频道身份组 API
@@ -224,7 +468,7 @@ class GuildBotProtocol:
     async def get_roles(self, guild_id: str) -> RoleRequest:
         """获取频道身份组列表信息，需要管理员权限"""
         result = await self._get(f"/guilds/{guild_id}/roles")
-        return RoleRequest.parse_obj(result)
+        return self.models.RoleRequest.parse_obj(result)
 
     async def create_roles(self, guild_id: str, filter: RolesFilter, info: RolesInfo) -> str:
         """创建一个频道身份组，需要管理员权限，返回 role_id"""
@@ -256,7 +500,24 @@ class GuildBotProtocol:
             ValueError("`5-子频道管理员` 需要指定子频道")
         if role_id == DefaultRoles.channel_admin and channel is not None:
             data = {"channel": channel.dict(exclude_none=True)}
-        return await self._put(f"/guilds/{guild_id}/members/{user_id}/roles/{role_id}", data)
+        result = await self._put(f"/guilds/{guild_id}/members/{user_id}/roles/{role_id}", data)
+        # 缓存中成员的身份组已经过期
+        if self.state is not None:
+            self.state.remove_member(guild_id, user_id)
+        return result
+
+    def bulk_add_roles_members(
+        self,
+        guild_id: str,
+        user_ids: Iterable[str],
+        role_id: int,
+        channel: Union[Channel, None] = None,
+        concurrency: int = 10,
+        retries: int = 0,
+        retry_delay: float = 1.0
+    ) -> AsyncIterator[BulkResult]:
+        """批量增加频道身份组成员，按完成顺序返回每个成员的结果"""
+        return run_bulk(lambda user_id: self.add_roles_members(guild_id, user_id, role_id, channel), user_ids, concurrency, retries, retry_delay, self.retry_policy)
 
 
     async def delete_roles_members(self, guild_id: str, user_id: str, role_id: int, channel: Union[Channel, None] = None) -> bool:
@@ -266,7 +527,10 @@ class GuildBotProtocol:
             ValueError("`5-子频道管理员` 需要指定子频道")
         if role_id == DefaultRoles.channel_admin and channel is not None:
             data = {"channel": channel.dict(exclude_none=True)}
-        return await self._delete(f"/guilds/{guild_id}/members/{user_id}/roles/{role_id}", data)
+        result = await self._delete(f"/guilds/{guild_id}/members/{user_id}/roles/{role_id}", data)
+        if self.state is not None:
+            self.state.remove_member(guild_id, user_id)
+        return result
 
     '''
     子频道权限 API
@@ -274,7 +538,7 @@ class GuildBotProtocol:
     async def get_member_permissions(self, channel_id: str, user_id: str) -> ChannelPermissions:
         """获取子频道用户权限"""
         result = await self._get(f"/channels/{channel_id}/members/{user_id}/permissions")
-        return ChannelPermissions.parse_obj(result)
+        return self.models.ChannelPermissions.parse_obj(result)
 
     async def edit_member_permissions(self, channel_id: str, user_id: str, add: str, remove: str) -> bool:
         """修改子频道用户权限"""
@@ -283,10 +547,23 @@ class GuildBotProtocol:
             "remove": remove
         })
 
+    def bulk_edit_member_permissions(
+        self,
+        channel_id: str,
+        user_ids: Iterable[str],
+        add: str,
+        remove: str,
+        concurrency: int = 10,
+        retries: int = 0,
+        retry_delay: float = 1.0
+    ) -> AsyncIterator[BulkResult]:
+        """批量修改子频道用户权限，按完成顺序返回每个用户的结果"""
+        return run_bulk(lambda user_id: self.edit_member_permissions(channel_id, user_id, add, remove), user_ids, concurrency, retries, retry_delay, self.retry_policy)
+
     async def get_role_permissions(self, channel_id: str, role_id: str) -> ChannelPermissions:
         """获取子频道身份组权限"""
         result = await self._get(f"/channels/{channel_id}/roles/{role_id}/permissions")
-        return ChannelPermissions.parse_obj(result)
+        return self.models.ChannelPermissions.parse_obj(result)
 
     async def edit_role_permissions(self, channel_id: str, role_id: str, add: str, remove: str) -> bool:
         """修改子频道身份组权限"""
@@ -304,7 +581,7 @@ class GuildBotProtocol:
             "recipient_id": recipient_id,
             "source_guild_id": source_guild_id
         })
-        return DMS.parse_obj(result)
+        return self.models.DMS.parse_obj(result)
 
     async def send_direct_message(
         self,
@@ -324,46 +601,54 @@ class GuildBotProtocol:
         if content is not None:
             data["content"] = content
         if embed is not None:
-            data["embed"] = embed.dict(exclude_none=True)
+            data["embed"] = embed.dict(by_alias=True, exclude_none=True)
         if ark is not None:
             data["ark"] = ark.dict(exclude_none=True)
         if image is not None:
             data["image"] = image
         result = await self._post(f"/dms/{guild_id}/messages", data)
-        return Message.parse_obj(result)
+        return self.models.Message.parse_obj(result)
+
+    async def send_direct_template(self, guild_id, template: MessageTemplate, message_id: Union[str, None] = None, **fields) -> Message:
+        """使用消息模板发送私信，`fields` 为模板占位符的值"""
+        result = await self._post(f"/dms/{guild_id}/messages", body=template.render(message_id, **fields))
+        return self.models.Message.parse_obj(result)
     
     '''
     禁言 API
     '''
-    async def mute_all(self, guild_id: str, mute_end_timestamp: Optional[int], mute_seconds: Optional[int]) -> bool:
+    async def mute_all(self, guild_id: str, mute_end_timestamp: Optional[int] = None, mute_seconds: Optional[int] = None) -> bool:
         """禁言全员"""
-        if mute_end_timestamp is not None:
-            data = {"mute_end_timestamp": str(mute_end_timestamp)}
-        elif mute_seconds is not None:
-            data = {"mute_seconds": str(mute_seconds)}
-        else:
-            ValueError("mute_end_timestamp, mute_seconds 参数必选其一")
-        if await self._patch(f"/guilds/{guild_id}/mute", data):
-            return True
-        return False
+        data = _mute_data(mute_end_timestamp, mute_seconds)
+        await self._patch(f"/guilds/{guild_id}/mute", data)
+        return True
 
     async def unmute_all(self, guild_id: str) -> bool:
         return await self.mute_all(guild_id, mute_seconds=0)
 
-    async def mute(self, guild_id: str, user_id: str, mute_end_timestamp: Optional[int], mute_seconds: Optional[int]) -> bool:
+    async def mute(self, guild_id: str, user_id: str, mute_end_timestamp: Optional[int] = None, mute_seconds: Optional[int] = None) -> bool:
         """禁言指定成员"""
-        if mute_end_timestamp is not None:
-            data = {"mute_end_timestamp": str(mute_end_timestamp)}
-        elif mute_seconds is not None:
-            data = {"mute_seconds": str(mute_seconds)}
-        else:
-            ValueError("mute_end_timestamp, mute_seconds 参数必选其一")
-        if await self._patch(f"/guilds/{guild_id}/members/{user_id}/mute", data):
-            return True
-        return False
+        data = _mute_data(mute_end_timestamp, mute_seconds)
+        await self._patch(f"/guilds/{guild_id}/members/{user_id}/mute", data)
+        return True
 
     async def unmute(self, guild_id: str) -> bool:
         return await self.mute(guild_id, mute_seconds=0)
+
+    def bulk_mute(
+        self,
+        guild_id: str,
+        user_ids: Iterable[str],
+        mute_end_timestamp: Optional[int] = None,
+        mute_seconds: Optional[int] = None,
+        concurrency: int = 10,
+        retries: int = 0,
+        retry_delay: float = 1.0
+    ) -> AsyncIterator[BulkResult]:
+        """批量禁言成员，按完成顺序返回每个成员的结果"""
+        # 参数错误时在开始执行之前抛出，而不是作为每个成员的失败结果返回
+        _mute_data(mute_end_timestamp, mute_seconds)
+        return run_bulk(lambda user_id: self.mute(guild_id, user_id, mute_end_timestamp, mute_seconds), user_ids, concurrency, retries, retry_delay, self.retry_policy)
     
     '''
     公告 API
@@ -374,7 +659,7 @@ class GuildBotProtocol:
             "message_id": message_id,
             "channel_id": channel_id
         })
-        return Announces.parse_obj(result)
+        return self.models.Announces.parse_obj(result)
     
     async def delete_guild_announces(self, guild_id: str, message_id: str) -> bool:
         """删除频道公告"""
@@ -385,7 +670,7 @@ class GuildBotProtocol:
         result = await self._post(f"/channels/{channel_id}/announces", {
             "message_id": message_id
         })
-        return Announces.parse_obj(result)
+        return self.models.Announces.parse_obj(result)
     
     async def delete_channel_id_announces(self, channel_id: str, message_id: str) -> bool:
         """删除子频道公告"""
@@ -399,26 +684,26 @@ class GuildBotProtocol:
         result = await self._get(f"/guilds/{guild_id}/schedules", {
             "since": since
         })
-        return [Schedule.parse_obj(_schedule) for _schedule in result]
+        return [self.models.Schedule.parse_obj(_schedule) for _schedule in result]
 
     async def get_schedule(self, channel_id: str, schedule_id: str) -> Schedule:
         """获取日程详情"""
         result = await self._get(f"/channels/{channel_id}/schedules/{schedule_id}")
-        return Schedule.parse_obj(result)
+        return self.models.Schedule.parse_obj(result)
 
     async def create_schedule(self, channel_id: str, schedule: Schedule) -> Schedule:
         """创建日程"""
         result = await self._post(f"/channels/{channel_id}/schedules", {
             "schedule": schedule
         })
-        return Schedule.parse_obj(result)
+        return self.models.Schedule.parse_obj(result)
 
     async def edit_schedule(self, channel_id: str, schedule_id: str, schedule: Schedule) -> Schedule:
         """修改日程"""
         result = await self._patch(f"/channels/{channel_id}/schedules/{schedule_id}", {
             "schedule": schedule
         })
-        return Schedule.parse_obj(result)
+        return self.models.Schedule.parse_obj(result)
 
     async def delete_schedule(self, channel_id: str, schedule_id: str) -> bool:
         """删除日程"""
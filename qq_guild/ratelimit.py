@@ -0,0 +1,198 @@
+import asyncio
+import time
+
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from .stats import LatencyRecorder
+
+# 路径中 ID 段前的资源名与对应的参数名
+_ROUTE_PARAMS = {
+    "guilds": "guild_id",
+    "channels": "channel_id",
+    "members": "user_id",
+    "messages": "message_id",
+    "roles": "role_id",
+    "announces": "message_id",
+    "schedules": "schedule_id",
+    "dms": "guild_id",
+    "users": "user_id"
+}
+
+def route_template(endpoint: str) -> str:
+    """将请求路径转换为路由模板，例如 `/channels/123/messages` -> `/channels/{channel_id}/messages`"""
+    parts = endpoint.split("?", 1)[0].split("/")
+    for i in range(1, len(parts)):
+        name = _ROUTE_PARAMS.get(parts[i - 1])
+        if name is not None and parts[i] and not parts[i].startswith("@"):
+            parts[i] = f"{{{name}}}"
+    return "/".join(parts)
+
+def _header_float(headers, name) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+class RouteBucket:
+    """单个路由模板的限流状态"""
+    def __init__(self, key: str, concurrency: int):
+        self.key = key
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+
+        self.queued = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.wait = LatencyRecorder()
+
+    def delay(self) -> float:
+        """距离当前桶可以发送请求还需等待的时间"""
+        if self.remaining is None or self.remaining > 0:
+            return 0.0
+        delay = self.reset_at - time.monotonic()
+        if delay <= 0:
+            self.remaining = None
+            return 0.0
+        return delay
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "concurrency": self.concurrency,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "remaining": self.remaining,
+            "wait": self.wait.summary()
+        }
+
+class RateLimiter:
+    """按路由模板分桶的请求调度器
+
+    每个桶有独立的并发上限，并根据服务端返回的频率限制响应头与 `Retry-After` 暂停发送；
+    全局并发数与每秒请求数另有上限。超出限制的请求会排队等待而不是直接失败。
+    """
+    def __init__(
+        self,
+        bucket_concurrency: int = 5,
+        global_concurrency: int = 50,
+        global_rate: Optional[float] = None,
+        bucket_limits: Optional[Dict[str, int]] = None,
+        default_retry_after: float = 1.0,
+        max_retries: int = 5
+    ):
+        self.bucket_concurrency = bucket_concurrency
+        self.global_concurrency = global_concurrency
+        self.global_rate = global_rate
+        # 指定路由的并发上限，键为 `METHOD /route/{template}`
+        self.bucket_limits = bucket_limits or {}
+        self.default_retry_after = default_retry_after
+        self.max_retries = max_retries
+
+        self._buckets: Dict[str, RouteBucket] = {}
+        self._global = asyncio.Semaphore(global_concurrency)
+        self._global_lock = asyncio.Lock()
+        self._tokens = global_rate or 0.0
+        self._tokens_updated = time.monotonic()
+
+        self.queued = 0
+        self.in_flight = 0
+        self.wait = LatencyRecorder()
+
+    def get_bucket(self, method: str, endpoint: str) -> RouteBucket:
+        key = f"{method} {route_template(endpoint)}"
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = RouteBucket(key, self.bucket_limits.get(key, self.bucket_concurrency))
+            self._buckets[key] = bucket
+        return bucket
+
+    async def _take_token(self):
+        if not self.global_rate:
+            return
+        async with self._global_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.global_rate, self._tokens + (now - self._tokens_updated) * self.global_rate)
+                self._tokens_updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.global_rate)
+
+    @asynccontextmanager
+    async def acquire(self, bucket: RouteBucket):
+        """等待直到桶与全局限制都允许发送请求"""
+        start = time.monotonic()
+        bucket.queued += 1
+        self.queued += 1
+        try:
+            await bucket.semaphore.acquire()
+            try:
+                delay = bucket.delay()
+                while delay > 0:
+                    await asyncio.sleep(delay)
+                    delay = bucket.delay()
+                await self._take_token()
+                await self._global.acquire()
+            except BaseException:
+                bucket.semaphore.release()
+                raise
+        finally:
+            bucket.queued -= 1
+            self.queued -= 1
+
+        waited = time.monotonic() - start
+        bucket.wait.record(waited)
+        self.wait.record(waited)
+        bucket.in_flight += 1
+        self.in_flight += 1
+        bucket.requests += 1
+        try:
+            yield
+        finally:
+            bucket.in_flight -= 1
+            self.in_flight -= 1
+            self._global.release()
+            bucket.semaphore.release()
+
+    def update(self, bucket: RouteBucket, status: int, headers) -> Optional[float]:
+        """根据响应更新桶状态，被限流时返回需要等待的秒数"""
+        remaining = _header_float(headers, "X-RateLimit-Remaining")
+        reset_after = _header_float(headers, "X-RateLimit-Reset-After")
+        if reset_after is None:
+            reset = _header_float(headers, "X-RateLimit-Reset")
+            if reset is not None:
+                reset_after = max(0.0, reset - time.time())
+        if remaining is not None:
+            bucket.remaining = int(remaining)
+            if reset_after is not None:
+                bucket.reset_at = time.monotonic() + reset_after
+
+        if status != 429:
+            return None
+        retry_after = _header_float(headers, "Retry-After")
+        if retry_after is None:
+            retry_after = reset_after if reset_after is not None else self.default_retry_after
+        bucket.throttled += 1
+        bucket.remaining = 0
+        bucket.reset_at = time.monotonic() + retry_after
+        return retry_after
+
+    def stats(self) -> dict:
+        """返回全局与各路由桶的排队深度、并发数与等待时间"""
+        return {
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "global_concurrency": self.global_concurrency,
+            "global_rate": self.global_rate,
+            "wait": self.wait.summary(),
+            "buckets": {key: bucket.stats() for key, bucket in self._buckets.items()}
+        }
@@ -0,0 +1,285 @@
+"""Gateway 事件录制与回放
+
+录制文件由文件头 `QQGF\\x01` 与若干帧组成，每帧为 15 字节的帧头 (时间戳 float64、分片 ID uint16、opcode uint8、
+长度 uint32，小端序) 加上解压后的原始 JSON。启用压缩时整个文件为 gzip 格式，追加写入会产生新的 gzip 成员。
+
+    bot = GuildBot(..., recorder=FrameRecorder("gateway.rec", compress=True))
+
+集群模式下每个工作进程写入单独的文件，文件名加上工作进程编号，例如 `gateway.0.rec`。
+
+回放时帧按录制时的间隔 (可加速或不等待) 交给 `Shard.ws_event`，与线上使用相同的解码与分发流程，REST 请求发往本地的 `MockAPI`：
+
+    report = await Replayer(bot, "gateway.rec", speed=None, mock=MockAPI()).run()
+"""
+import asyncio
+import gzip
+import os
+import struct
+import time
+import tracemalloc
+
+from typing import Dict, Iterator, Iterable, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+
+from .models.ws import opcode
+from .ratelimit import route_template
+from .shard import Shard
+from .logger import Session
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+MAGIC = b"QQGF\x01"
+# 时间戳、分片 ID、opcode、长度
+FRAME_HEADER = struct.Struct("<dHBI")
+
+class FrameRecorder:
+    """将 Gateway 帧追加写入录制文件，每 `flush_interval` 秒写入磁盘一次"""
+    def __init__(self, path: str, compress: bool = False, flush_interval: float = 1.0):
+        self.path = path
+        self.compress = compress
+        self.flush_interval = flush_interval
+        self._file = None
+        self._flushed_at = 0.0
+
+        self.frames = 0
+        self.bytes = 0
+
+    def for_worker(self, worker_id: int):
+        """集群模式下由工作进程调用，改为写入该进程单独的文件，避免多个进程交错写入同一个文件"""
+        self.close()
+        root, ext = os.path.splitext(self.path)
+        self.path = f"{root}.{worker_id}{ext}"
+
+    def _open(self):
+        empty = _is_empty(self.path)
+        self._file = gzip.open(self.path, "ab") if self.compress else open(self.path, "ab")
+        # 文件头只在新文件的开头写入一次
+        if empty:
+            self._file.write(MAGIC)
+        self._flushed_at = time.monotonic()
+
+    def write(self, shard_id: int, op: int, data):
+        if self._file is None:
+            self._open()
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._file.write(FRAME_HEADER.pack(time.time(), shard_id, op if op is not None else 255, len(data)))
+        self._file.write(data)
+        self.frames += 1
+        self.bytes += len(data)
+        now = time.monotonic()
+        if now - self._flushed_at >= self.flush_interval:
+            self._file.flush()
+            self._flushed_at = now
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self) -> dict:
+        return {"path": self.path, "frames": self.frames, "bytes": self.bytes}
+
+def _is_empty(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return not f.read(1)
+    except FileNotFoundError:
+        return True
+
+def read_frames(path: str) -> Iterator[Tuple[float, int, int, bytes]]:
+    """读取录制文件，返回 (时间戳, 分片 ID, opcode, 帧内容)"""
+    with open(path, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+    with (gzip.open(path, "rb") if compressed else open(path, "rb")) as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} 不是 Gateway 录制文件")
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                # 文件结尾或写入时中断的最后一帧
+                return
+            timestamp, shard_id, op, length = FRAME_HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            yield timestamp, shard_id, op, data
+
+class _ReplaySocket:
+    """代替 WebSocket 连接向 `Shard.ws_event` 提供录制的帧"""
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
+        self.closed = False
+
+    async def receive(self) -> aiohttp.WSMessage:
+        message = await self.queue.get()
+        if message.type == aiohttp.WSMsgType.CLOSE:
+            self.closed = True
+        return message
+
+    async def send_json(self, data, dumps=None):
+        pass
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+class MockAPI:
+    """本地 REST 模拟服务，记录各路由的请求数，每个请求等待 `latency` 秒后返回固定内容"""
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.url: Optional[str] = None
+        self.requests: Dict[str, int] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        route = f"{request.method} {route_template(request.path)}"
+        self.requests[route] = self.requests.get(route, 0) + 1
+        await request.read()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.method in ("PUT", "DELETE"):
+            return web.Response(status=204)
+        parts = request.path.split("/")
+        channel_id = parts[2] if len(parts) > 2 and parts[1] == "channels" else "0"
+        return web.json_response({
+            "id": str(sum(self.requests.values())),
+            "channel_id": channel_id,
+            "guild_id": "0",
+            "content": "",
+            "timestamp": "1970-01-01T00:00:00+00:00",
+            "author": {"id": "0", "username": "mock", "bot": True}
+        })
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+class Replayer:
+    """按录制的时间间隔回放 Gateway 帧并统计性能
+
+    `speed` 为回放倍速，None 表示不等待、以最快速度回放。默认只回放 Dispatch 帧 (`ops`)，
+    `shard_ids` 可以只回放部分分片。回放结束后等待事件处理器执行完毕，返回事件吞吐、各处理器耗时分位数、
+    REST 请求数与内存占用；`trace_memory` 开启时额外使用 tracemalloc 统计 Python 对象的峰值内存。
+    """
+    def __init__(
+        self,
+        bot,
+        path: str,
+        speed: Optional[float] = 1.0,
+        ops: Iterable[int] = (opcode.Dispatch,),
+        shard_ids: Optional[Iterable[int]] = None,
+        mock: Optional[MockAPI] = None,
+        trace_memory: bool = False,
+        queue_size: int = 1000
+    ):
+        self.bot = bot
+        self.path = path
+        self.speed = speed
+        self.ops = set(ops)
+        self.shard_ids = set(shard_ids) if shard_ids is not None else None
+        self.mock = mock
+        self.trace_memory = trace_memory
+        self.queue_size = queue_size
+
+        self.shards: Dict[int, Shard] = {}
+        self._queues: Dict[int, asyncio.Queue] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self.frames = 0
+
+    def _shard(self, shard_id: int) -> asyncio.Queue:
+        queue = self._queues.get(shard_id)
+        if queue is None:
+            queue = self._queues[shard_id] = asyncio.Queue(self.queue_size)
+            shard = Shard(self.bot, self.bot.shard_manager, shard_id, 0, "replay")
+            shard.ws = _ReplaySocket(queue)
+            self.shards[shard_id] = shard
+            self._tasks[shard_id] = asyncio.ensure_future(shard.ws_event())
+        return queue
+
+    async def _feed(self):
+        start = time.monotonic()
+        first = None
+        for timestamp, shard_id, op, data in read_frames(self.path):
+            if op not in self.ops or (self.shard_ids is not None and shard_id not in self.shard_ids):
+                continue
+            if self.speed:
+                if first is None:
+                    first = timestamp
+                delay = start + (timestamp - first) / self.speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await self._shard(shard_id).put(aiohttp.WSMessage(aiohttp.WSMsgType.BINARY, data, None))
+            self.frames += 1
+        for queue in self._queues.values():
+            await queue.put(aiohttp.WSMessage(aiohttp.WSMsgType.CLOSE, 1000, None))
+
+    async def run(self) -> dict:
+        url = self.bot.url
+        if self.mock is not None:
+            await self.mock.start()
+            self.bot.url = self.mock.url
+        if self.trace_memory:
+            tracemalloc.start()
+        Session.info(f"开始回放 {self.path}，倍速: {self.speed or '不限'}")
+        start = time.monotonic()
+        try:
+            await self._feed()
+            await asyncio.gather(*self._tasks.values())
+            # 等待分片与 worker 池队列中的事件处理完毕
+            await asyncio.gather(*(shard.drain() for shard in self.shards.values()))
+            await asyncio.gather(*(pool.drain() for pool in self.bot.dispatcher.pools.values()))
+            elapsed = time.monotonic() - start
+            peak = tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+        finally:
+            for shard in self.shards.values():
+                await shard.close()
+            if self.trace_memory:
+                tracemalloc.stop()
+            if self.mock is not None:
+                await self.mock.close()
+                self.bot.url = url
+        return self.report(elapsed, peak)
+
+    def report(self, elapsed: float, traced_peak: Optional[int] = None) -> dict:
+        handlers = []
+        for handler_list in self.bot._handlers.values():
+            for handler in handler_list:
+                latency = handler.latency
+                handlers.append({
+                    "handler": handler.name,
+                    "event": handler.event_name,
+                    "calls": handler.calls,
+                    "errors": handler.errors,
+                    "filtered": handler.filtered,
+                    "p50": latency.percentile(50),
+                    "p95": latency.percentile(95),
+                    "p99": latency.percentile(99),
+                    "max": latency.max
+                })
+        return {
+            "frames": self.frames,
+            "elapsed": elapsed,
+            "events_per_sec": self.frames / elapsed if elapsed else 0.0,
+            "handlers": handlers,
+            "rest_requests": dict(self.mock.requests) if self.mock is not None else None,
+            # Linux 上 ru_maxrss 的单位为 KB
+            "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource is not None else None,
+            "traced_peak": traced_peak
+        }
@@ -0,0 +1,71 @@
+import random
+
+from typing import Iterable, Optional
+
+class RetryPolicy:
+    """REST 请求的重试策略
+
+    连接失败、连接被重置、超时与 `retry_statuses` 中的状态码会按指数退避加随机抖动重试，最多 `max_retries` 次。
+    GET、PUT、DELETE 是幂等的，总是可以重试；POST、PATCH 只有在调用时声明幂等或路由在 `idempotent_routes`
+    (例如 `POST /channels/{channel_id}/messages`) 中时才会重试，连接未建立的失败除外。
+
+    所有请求共享一个重试预算：每个请求存入 `budget_ratio` 个令牌，每次重试消耗一个，令牌最多 `budget` 个。
+    服务端持续故障时重试会被预算限制，不会把请求量放大到 `max_retries` 倍。
+    """
+    IDEMPOTENT_METHODS = {"GET", "PUT", "DELETE", "HEAD", "OPTIONS"}
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 10.0,
+        retry_statuses: Iterable[int] = (500, 502, 503, 504),
+        idempotent_routes: Iterable[str] = (),
+        budget: float = 10.0,
+        budget_ratio: float = 0.1
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = set(retry_statuses)
+        self.idempotent_routes = set(idempotent_routes)
+        self.budget = budget
+        self.budget_ratio = budget_ratio
+
+        self._tokens = budget
+        self.requests = 0
+        self.retries = 0
+        self.exhausted = 0
+
+    def is_idempotent(self, method: str, route: str, hint: Optional[bool] = None) -> bool:
+        """`route` 为限流桶的键，即 `METHOD /route/{template}`"""
+        if hint is not None:
+            return hint
+        return method in self.IDEMPOTENT_METHODS or route in self.idempotent_routes
+
+    def on_request(self):
+        self.requests += 1
+        self._tokens = min(self.budget, self._tokens + self.budget_ratio)
+
+    def acquire(self) -> bool:
+        """从重试预算中取出一次重试，预算用尽时返回 False"""
+        if self._tokens < 1:
+            self.exhausted += 1
+            return False
+        self._tokens -= 1
+        self.retries += 1
+        return True
+
+    def backoff(self, attempt: int) -> Optional[float]:
+        """第 `attempt` 次重试前的等待时间 (full jitter)，重试次数或预算用尽时返回 None"""
+        if attempt >= self.max_retries or not self.acquire():
+            return None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "budget": self._tokens,
+            "budget_exhausted": self.exhausted
+        }
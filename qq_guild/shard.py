@@ -0,0 +1,379 @@
+import asyncio
+import aiohttp
+import random
+import time
+import zlib
+
+from typing import Dict, List, Optional
+
+from .compression import ZlibStreamInflater
+from .models.ws import opcode
+from .stats import LatencyRecorder
+from .logger import Event, Network, Session
+
+# 可以重连的关闭码，其中会话失效的关闭码需要重新鉴权
+RECONNECT_CLOSE_CODES = {4006, 4007, 4008, 4009}
+INVALID_SESSION_CLOSE_CODES = {4006, 4007}
+# 机器人已下架 (只能连接沙箱环境) 或被封禁，重连也不会成功
+STOP_CLOSE_CODES = {4914, 4915}
+
+class ShardStatus:
+    DISCONNECTED = "disconnected"
+    CONNECTING = "connecting"
+    IDENTIFYING = "identifying"
+    RESUMING = "resuming"
+    CONNECTED = "connected"
+
+class Shard:
+    """单个分片的 Gateway 连接"""
+    def __init__(self, bot, manager: "ShardManager", shard_id: int, shard_count: int, gateway_url: str):
+        self.bot = bot
+        self.manager = manager
+        self.shard_id = shard_id
+        self.shard_count = shard_count
+        self.gateway_url = gateway_url
+        self.ws = None
+        self.inflater: Optional[ZlibStreamInflater] = None
+
+        self.s = 0
+        self.heartbeat_interval = 0
+        self.session = None
+        self.status = ShardStatus.DISCONNECTED
+        self.latency: Optional[float] = None
+
+        # 心跳状态，每个连接只有一个心跳任务
+        self.heartbeat_rtt = LatencyRecorder(window=100)
+        # 实际心跳间隔与预期间隔的偏差，事件循环被阻塞时会变大
+        self.heartbeat_jitter = LatencyRecorder(window=100)
+        self.missed_heartbeats = 0
+        self._heartbeat_sent: Optional[float] = None
+        self._heartbeat_acked = True
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+        # 读取循环只处理控制帧，Dispatch 事件放入有界队列由分发任务交给事件处理器，
+        # worker 池背压时读取循环仍能收到心跳响应；队列跨重连保留，已确认序列号的事件不会丢失
+        self.dispatch_queue_size = 1000
+        self._events: Optional[asyncio.Queue] = None
+        self._dispatch_task: Optional[asyncio.Task] = None
+        # 分发队列已满、读取循环暂停时为 True
+        self._backpressure = False
+
+        # 重连状态
+        self.reconnect_base_delay = 0.5
+        self.reconnect_max_delay = 60
+        self.reconnects = 0
+        self.resume_latency = LatencyRecorder()
+        self._reconnect_attempts = 0
+        self._disconnected_at: Optional[float] = None
+        self._closed = False
+
+    async def run(self):
+        """保持 Gateway 连接，断开后按带抖动的指数退避重连，并从最后的序列号恢复会话"""
+        self._closed = False
+        while not self._closed:
+            try:
+                session = await self.bot._get_client_session()
+                self.status = ShardStatus.CONNECTING
+                params = None
+                self.inflater = None
+                if self.bot.compress:
+                    # 每个连接使用独立的解压上下文
+                    params = {"compress": "zlib-stream"}
+                    self.inflater = ZlibStreamInflater()
+                self.ws = await session.ws_connect(self.gateway_url, params=params)
+                reconnect = await self.ws_event()
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                Network.warn(f"分片 {self.shard_id} 连接失败: {e!r}")
+                reconnect = True
+            self._stop_heartbeat()
+            if self.ws is not None and not self.ws.closed:
+                await self.ws.close()
+            self.status = ShardStatus.DISCONNECTED
+            if not reconnect or self._closed:
+                break
+
+            if self._disconnected_at is None:
+                self._disconnected_at = time.monotonic()
+            delay = self._reconnect_delay()
+            self._reconnect_attempts += 1
+            self.reconnects += 1
+            Network.info(f"分片 {self.shard_id} 将在 {delay:.2f} 秒后重连")
+            await asyncio.sleep(delay)
+
+    def _reconnect_delay(self) -> float:
+        # 首次重连立即进行，之后按指数退避并加入随机抖动
+        if self._reconnect_attempts == 0:
+            return 0
+        ceiling = min(self.reconnect_max_delay, self.reconnect_base_delay * 2 ** self._reconnect_attempts)
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _connected(self, resumed: bool):
+        self.status = ShardStatus.CONNECTED
+        self._reconnect_attempts = 0
+        if self._disconnected_at is not None:
+            elapsed = time.monotonic() - self._disconnected_at
+            self._disconnected_at = None
+            if resumed:
+                self.resume_latency.record(elapsed)
+                Network.info(f"分片 {self.shard_id} 恢复会话耗时 {elapsed * 1000:.0f} ms")
+
+    async def close(self, timeout: Optional[float] = 10):
+        """停止读取 Gateway，等待已收到的事件交给事件处理器 (最多 `timeout` 秒) 后停止分发"""
+        self._closed = True
+        self.status = ShardStatus.DISCONNECTED
+        self._stop_heartbeat()
+        if self.ws is not None and not self.ws.closed:
+            await self.ws.close()
+        if self._dispatch_task is not None:
+            # 队列中事件的序列号已经确认，恢复会话时不会重发
+            try:
+                await asyncio.wait_for(self.drain(), timeout)
+            except asyncio.TimeoutError:
+                Event.warn(f"分片 {self.shard_id} 等待事件分发超时，丢弃 {self._events.qsize()} 个事件")
+            self._dispatch_task.cancel()
+            self._dispatch_task = None
+
+    def _start_dispatch(self):
+        if self._dispatch_task is None:
+            self._events = asyncio.Queue(self.dispatch_queue_size)
+            self._dispatch_task = asyncio.create_task(self._dispatch())
+
+    async def _dispatch(self):
+        while True:
+            t, d = await self._events.get()
+            try:
+                await self.bot.event_handler(t, d)
+            except Exception:
+                Event.exception(f"分片 {self.shard_id} 分发事件失败: {t}")
+            finally:
+                self._events.task_done()
+
+    async def _enqueue(self, t, d):
+        if not self._events.full():
+            self._events.put_nowait((t, d))
+            return
+        # 队列已满时暂停读取，背压传递到 Gateway
+        self._backpressure = True
+        try:
+            await self._events.put((t, d))
+        finally:
+            self._backpressure = False
+
+    async def drain(self):
+        """等待已收到的事件全部交给事件处理器"""
+        if self._events is not None:
+            await self._events.join()
+
+    async def _auth(self):
+        if self.session == None:
+            await self.manager.wait_identify(self.shard_id)
+            self.status = ShardStatus.IDENTIFYING
+            load = {
+                "op": opcode.Identify,
+                "d": {
+                    "token": self.bot.token,
+                    "intents": self.bot.intents,
+                    "shard": [self.shard_id, self.shard_count],
+                    "properties": {
+                        "$os": "linux",
+                        "$browser": "python_sdk",
+                        "$device": "server"
+                    }
+                }
+            }
+        else:
+            self.status = ShardStatus.RESUMING
+            load = {
+                "op": opcode.Resume,
+                "d": {
+                    "token": self.bot.token,
+                    "session_id": self.session,
+                    "seq": self.s
+                }
+            }
+        await self.ws.send_json(load, dumps=self.bot.codec.dumps)
+
+    def _start_heartbeat(self):
+        self._stop_heartbeat()
+        self._heartbeat_acked = True
+        self._heartbeat_sent = None
+        self._heartbeat_task = asyncio.create_task(self._heartbeat(self.ws))
+
+    def _stop_heartbeat(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    async def _heartbeat(self, ws):
+        while not ws.closed:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not self._heartbeat_acked:
+                self.missed_heartbeats += 1
+                if self._backpressure:
+                    # 读取因背压暂停，心跳响应可能还在缓冲区中，暂不判断连接失效
+                    Network.warn(f"分片 {self.shard_id} 读取已暂停，未确认心跳响应")
+                else:
+                    # 上一次心跳没有收到响应，连接可能已经失效
+                    Network.warn(f"分片 {self.shard_id} 未收到心跳响应，强制重连")
+                    await ws.close(code=4000)
+                    return
+            Network.debug(f"分片 {self.shard_id} 发送心跳")
+            now = time.monotonic()
+            if self._heartbeat_sent is not None:
+                self.heartbeat_jitter.record(abs(now - self._heartbeat_sent - self.heartbeat_interval))
+            self._heartbeat_acked = False
+            self._heartbeat_sent = now
+            try:
+                await ws.send_json({
+                    "op": opcode.Heartbeat,
+                    "d": self.s
+                }, dumps=self.bot.codec.dumps)
+            except (aiohttp.ClientError, ConnectionError):
+                return
+
+    async def ws_event(self) -> bool:
+        """处理当前连接上的消息，连接断开时返回是否需要重连"""
+        self._start_dispatch()
+        while True:
+            message = await self.ws.receive()
+            Network.debug("分片 {} 接收内容: {}", self.shard_id, message.data)
+            if message.type == aiohttp.WSMsgType.CLOSE:
+                code = message.data
+                if code in INVALID_SESSION_CLOSE_CODES:
+                    Network.warn(f"会话失效 ({code})，尝试重新登录")
+                    self.session = None
+                elif code in STOP_CLOSE_CODES:
+                    Network.error(f"机器人已下架或被封禁 ({code})，停止重连")
+                    return False
+                elif code in RECONNECT_CLOSE_CODES:
+                    Network.warn(f"连接过期 ({code})，尝试重新连接")
+                elif isinstance(code, int) and code >= 4900:
+                    Network.warn(f"内部错误 ({code})，尝试重新连接")
+                elif isinstance(code, int) and code >= 4000:
+                    Network.error(f"发生意料之外的关闭码: {code}")
+                    return False
+                else:
+                    Network.info("连接已断开，尝试重连")
+                return True
+            if message.type in (aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                Network.info("连接已断开，尝试重连")
+                return True
+            data = message.data
+            if message.type == aiohttp.WSMsgType.BINARY and self.inflater is not None:
+                try:
+                    data = self.inflater.feed(data)
+                except zlib.error as e:
+                    # 解压上下文已损坏，只能重新建立连接
+                    Network.warn(f"分片 {self.shard_id} 解压失败: {e}")
+                    return True
+                if data is None:
+                    continue
+            try:
+                message = self.bot.codec.loads(data)
+            except (TypeError, ValueError):
+                continue
+            # 事件内容在事件处理器需要时才解析为模型
+            op = message.get("op")
+            if self.bot.recorder is not None:
+                self.bot.recorder.write(self.shard_id, op, data)
+            d = message.get("d")
+            if op == opcode.Hello:
+                self.heartbeat_interval = d["heartbeat_interval"] / 1000
+                self._start_heartbeat()
+                await self._auth()
+            elif op == opcode.Dispatch:
+                if message.get("s") is not None:
+                    self.s = message["s"]
+                t = message.get("t")
+                if t == "READY":
+                    self.session = d["session_id"]
+                    self._connected(resumed=False)
+                    Session.info(f"分片 {self.shard_id}/{self.shard_count} 已连接: @{d['user']['username']} ({d['user']['id']})")
+                elif t == "RESUMED":
+                    self._connected(resumed=True)
+                    Network.info("重连成功")
+                await self._enqueue(t, d) # 发送给事件处理器
+            elif op == opcode.InvalidSession:
+                Network.warn("连接参数错误，尝试重新登录")
+                self.session = None
+                await self._auth()
+            elif op == opcode.Reconnect:
+                Network.info("服务端通知重连，开始重连")
+                return True
+            elif op == opcode.HeartbeatACK:
+                self._heartbeat_acked = True
+                if self._heartbeat_sent is not None:
+                    self.latency = time.monotonic() - self._heartbeat_sent
+                    self.heartbeat_rtt.record(self.latency)
+                Network.debug("收到心跳响应")
+
+    def info(self) -> dict:
+        return {
+            "shard_id": self.shard_id,
+            "shard_count": self.shard_count,
+            "status": self.status,
+            "session_id": self.session,
+            "seq": self.s,
+            "latency": self.latency,
+            "heartbeat_rtt": self.heartbeat_rtt.summary(),
+            "heartbeat_jitter": self.heartbeat_jitter.summary(),
+            "missed_heartbeats": self.missed_heartbeats,
+            "reconnects": self.reconnects,
+            "resume_latency": self.resume_latency.summary(),
+            "compression": self.inflater.stats() if self.inflater is not None else None
+        }
+
+class IdentifyLimiter:
+    """identify 鉴权节流，同一个桶 (shard_id % max_concurrency) 每 `interval` 秒只允许一次鉴权"""
+    def __init__(self, max_concurrency: int = 1, interval: float = 5):
+        self.max_concurrency = max(1, max_concurrency)
+        self.interval = interval
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._identify_at: Dict[int, float] = {}
+
+    async def wait(self, shard_id: int):
+        key = shard_id % self.max_concurrency
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            if key in self._identify_at:
+                delay = self._identify_at[key] + self.interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self._identify_at[key] = time.monotonic()
+
+class ShardManager:
+    """根据 `/gateway/bot` 的推荐分片数启动并管理所有分片连接"""
+    # 同一个 identify 桶内两次鉴权之间的间隔 (秒)
+    IDENTIFY_INTERVAL = 5
+
+    def __init__(self, bot, shard_count: Optional[int] = None, shard_ids: Optional[List[int]] = None):
+        self.bot = bot
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+        self.identify_limiter = IdentifyLimiter(interval=self.IDENTIFY_INTERVAL)
+        self.shards: Dict[int, Shard] = {}
+
+    async def start(self):
+        gateway = await self.bot._get_shards_gateway_url()
+        shard_count = self.shard_count or gateway.shards
+        shard_ids = self.shard_ids if self.shard_ids is not None else range(shard_count)
+        self.identify_limiter = IdentifyLimiter(gateway.session_start_limit.max_concurrency, self.IDENTIFY_INTERVAL)
+        if gateway.session_start_limit.remaining < len(shard_ids):
+            Session.warn(f"剩余鉴权次数 ({gateway.session_start_limit.remaining}) 少于需要启动的分片数 ({len(shard_ids)})")
+        Session.info(f"启动 {len(shard_ids)} 个分片，共 {shard_count} 个分片，max_concurrency={self.identify_limiter.max_concurrency}")
+
+        self.shards = {
+            shard_id: Shard(self.bot, self, shard_id, shard_count, gateway.url)
+            for shard_id in shard_ids
+        }
+        await asyncio.gather(*(shard.run() for shard in self.shards.values()))
+
+    async def close(self, timeout: Optional[float] = 10):
+        await asyncio.gather(*(shard.close(timeout) for shard in self.shards.values()))
+
+    async def wait_identify(self, shard_id: int):
+        """等待分片所在 identify 桶的下一个鉴权时机"""
+        await self.identify_limiter.wait(shard_id)
+
+    def status(self) -> List[dict]:
+        return [shard.info() for shard in self.shards.values()]
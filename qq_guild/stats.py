@@ -0,0 +1,43 @@
+from collections import deque
+
+class LatencyRecorder:
+    """记录最近的耗时样本 (秒)，用于统计平均值与分位数"""
+    __slots__ = ("samples", "count", "total", "max")
+
+    def __init__(self, window: int = 1000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p: float) -> float:
+        """计算最近样本的分位数，p 取值 0 ~ 100"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    @property
+    def last(self) -> float:
+        return self.samples[-1] if self.samples else 0.0
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": self.average,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99)
+        }
@@ -0,0 +1,64 @@
+import re
+
+from typing import List, Optional, Union
+
+from .codec import JSONCodec, default_codec
+from .models import MessageArk, MessageEmbed
+
+# 字符串中的 `{name}` 占位符
+_SLOT = re.compile(rb"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+_MSG_ID = b'{"msg_id":'
+
+class MessageTemplate:
+    """预先序列化的消息模板
+
+    content、embed、ark 中的字符串可以包含 `{name}` 占位符。模板创建时只序列化一次，
+    `render` 只编码替换的字段并与预先编码好的片段拼接，直接得到请求体的 bytes：
+
+        template = MessageTemplate(embed=MessageEmbed(title="{name} 的资料", ...))
+        await bot.send_template(channel_id, template, message_id=msg.id, name=msg.author.username)
+    """
+    __slots__ = ("codec", "segments", "slots")
+
+    def __init__(
+        self,
+        content: Optional[str] = None,
+        embed: Union[MessageEmbed, dict, None] = None,
+        ark: Union[MessageArk, dict, None] = None,
+        image: Optional[str] = None,
+        codec: Optional[JSONCodec] = None
+    ):
+        if content is None and embed is None and ark is None and image is None:
+            raise ValueError("content, embed, ark, image 参数必选其一")
+        self.codec = codec or default_codec
+        data = {}
+        if content is not None:
+            data["content"] = content
+        if embed is not None:
+            data["embed"] = embed if isinstance(embed, dict) else embed.dict(by_alias=True, exclude_none=True)
+        if ark is not None:
+            data["ark"] = ark if isinstance(ark, dict) else ark.dict(exclude_none=True)
+        if image is not None:
+            data["image"] = image
+
+        # 去掉开头的 `{`，渲染时在前面拼接 msg_id
+        body = self.codec.dumps_bytes(data)[1:]
+        self.segments: List[bytes] = []
+        self.slots: List[str] = []
+        start = 0
+        for match in _SLOT.finditer(body):
+            self.segments.append(body[start:match.start()])
+            self.slots.append(match.group(1).decode())
+            start = match.end()
+        self.segments.append(body[start:])
+
+    def render(self, message_id: Optional[str] = None, **fields) -> bytes:
+        """填充占位符，返回编码后的请求体"""
+        dumps = self.codec.dumps_bytes
+        segments = self.segments
+        parts = [_MSG_ID, dumps(message_id), b",", segments[0]]
+        for i, name in enumerate(self.slots):
+            # 编码为 JSON 字符串后去掉两侧引号，得到转义后的字符串内容
+            parts.append(dumps(str(fields[name]))[1:-1])
+            parts.append(segments[i + 1])
+        return b"".join(parts)
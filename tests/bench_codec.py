@@ -0,0 +1,42 @@
+"""JSON 编解码器测试：对 Gateway 帧比较各编解码器的解析与编码吞吐
+
+默认使用 `tests.bench_events` 生成的帧，也可以传入 `FrameRecorder` 录制的文件：
+
+    python -m tests.bench_codec [gateway.rec]
+"""
+import json
+import sys
+import time
+
+from qq_guild.codec import CODECS, orjson, ujson
+from qq_guild.replay import read_frames
+from tests.bench_events import gateway_frames
+
+def load_frames(path=None) -> list:
+    if path is None:
+        return [json.dumps(frame, ensure_ascii=False).encode("utf-8") for frame in gateway_frames()]
+    return [data for _, _, _, data in read_frames(path)]
+
+def main(path=None):
+    frames = load_frames(path)
+    objects = [json.loads(frame) for frame in frames]
+    size = sum(len(frame) for frame in frames)
+    print(f"{len(frames)} 帧，共 {size / 1024:.0f} KB")
+    print(f"{'codec':<10}{'loads':>14}{'dumps':>14}")
+    for name, cls in CODECS.items():
+        if (name == "orjson" and orjson is None) or (name == "ujson" and ujson is None):
+            print(f"{name:<10}{'未安装':>14}")
+            continue
+        codec = cls()
+        start = time.perf_counter()
+        for frame in frames:
+            codec.loads(frame)
+        loads = len(frames) / (time.perf_counter() - start)
+        start = time.perf_counter()
+        for obj in objects:
+            codec.dumps_bytes(obj)
+        dumps = len(objects) / (time.perf_counter() - start)
+        print(f"{name:<10}{loads:>12,.0f}/s{dumps:>12,.0f}/s")
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
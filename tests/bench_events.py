@@ -0,0 +1,81 @@
+"""事件解析测试：旧的 Union 模型整帧解析与按事件类型查表、按需解析的事件吞吐
+
+    python -m tests.bench_events
+"""
+import random
+import time
+
+from typing import Optional, Union
+
+from pydantic import BaseModel
+
+from qq_guild.models.api import AudioAction, Channel, Guild, MemberWithGuildID, Message, MessageAudited
+from qq_guild.models.api.reaction import MessageReaction
+from qq_guild.models.ws.authorization import Authorization
+from qq_guild.models.ws.base import HeartBeat, parse_event
+from qq_guild.models.ws.ready import Ready
+
+FRAMES = 20000
+
+class UnionLoad(BaseModel):
+    """按 Union 依次尝试每个模型的整帧解析"""
+    op: int
+    d: Optional[Union[
+        int, str, Ready, HeartBeat, Authorization, Guild, Message, Channel,
+        MemberWithGuildID, AudioAction, MessageAudited, MessageReaction
+    ]]
+    s: Optional[int]
+    t: Optional[str]
+
+USER = {"id": "1234567890", "username": "用户名", "avatar": "https://thirdqq.qlogo.cn/0", "bot": False}
+
+def gateway_frames(count: int = FRAMES, seed: int = 0) -> list:
+    """消息、成员、表情表态与子频道事件混合的 Dispatch 帧"""
+    rng = random.Random(seed)
+    frames = []
+    for seq in range(count):
+        r = rng.random()
+        if r < 0.5:
+            t, d = "AT_MESSAGE_CREATE", {
+                "id": f"m{seq}", "channel_id": "1", "guild_id": "2", "content": "<@!123> 你好，这是一条消息",
+                "timestamp": "2022-01-01T00:00:00+08:00", "author": USER,
+                "member": {"roles": ["1", "4"], "joined_at": "2021-01-01T00:00:00+08:00"}
+            }
+        elif r < 0.7:
+            t, d = "GUILD_MEMBER_ADD", {
+                "guild_id": "2", "user": USER, "nick": "昵称", "roles": ["1"], "joined_at": "2021-01-01T00:00:00+08:00"
+            }
+        elif r < 0.85:
+            t, d = "MESSAGE_REACTION_ADD", {
+                "user_id": "1", "guild_id": "2", "channel_id": "1",
+                "target": {"id": f"m{seq}", "type": "0"}, "emoji": {"id": "4", "type": "1"}
+            }
+        else:
+            t, d = "CHANNEL_UPDATE", {
+                "id": "1", "guild_id": "2", "name": "子频道", "type": 0, "sub_type": 0,
+                "position": 1, "parent_id": "3", "owner_id": "0"
+            }
+        frames.append({"op": 0, "s": seq, "t": t, "d": d})
+    return frames
+
+def measure(name: str, parse, frames: list):
+    start = time.perf_counter()
+    for frame in frames:
+        parse(frame)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28}{len(frames) / elapsed:>12,.0f} events/s")
+
+def main():
+    frames = gateway_frames()
+    measure("Union Load", UnionLoad.parse_obj, frames)
+    measure("dispatch table", lambda frame: parse_event(frame["t"], frame["d"]), frames)
+
+    def lazy(frame):
+        # 只有注册了处理器的事件类型才解析
+        if frame["t"] == "AT_MESSAGE_CREATE":
+            parse_event(frame["t"], frame["d"])
+
+    measure("lazy (AT_MESSAGE_CREATE)", lazy, frames)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""KeyedWorkerPool 吞吐测试：固定通道数，key 数量增加时的事件吞吐与每个 key 的顺序
+
+    python -m tests.bench_keyed_pool
+"""
+import asyncio
+import random
+import time
+
+from logbook import NullHandler
+
+from qq_guild.dispatcher import Handler, KeyedWorkerPool, WorkerPool
+from tests.test_keyed_pool import fake_stream
+
+EVENTS = 20000
+HANDLER_DELAY = 0.001
+
+async def measure(pool: WorkerPool, keys: int) -> dict:
+    handled = {}
+    rng = random.Random(0)
+
+    async def callback(bot, event):
+        # 耗时在 0 ~ 2 倍之间随机，无序的 worker 池会打乱同一子频道的顺序
+        await asyncio.sleep(rng.random() * 2 * HANDLER_DELAY)
+        handled.setdefault(event.channel_id, []).append(event.seq)
+
+    handler = Handler(callback, "AT_MESSAGE_CREATE", pool=pool.name)
+    events = fake_stream(keys, max(1, EVENTS // keys))
+    start = time.perf_counter()
+    for event in events:
+        await pool.submit(handler, None, event)
+    await pool.drain()
+    elapsed = time.perf_counter() - start
+    await pool.close()
+    ordered = all(seqs == sorted(seqs) for seqs in handled.values())
+    return {"events": len(events), "per_sec": len(events) / elapsed, "ordered": ordered}
+
+async def main():
+    print(f"{'pool':<22}{'keys':>8}{'events/s':>12}  ordered")
+    for keys in (1, 10, 100, 1000, 10000):
+        for pool in (WorkerPool("unordered", workers=32), KeyedWorkerPool("keyed", lanes=32)):
+            result = await measure(pool, keys)
+            print(f"{type(pool).__name__:<22}{keys:>8}{result['per_sec']:>12,.0f}  {result['ordered']}")
+
+if __name__ == "__main__":
+    with NullHandler().applicationbound():
+        asyncio.run(main())
@@ -0,0 +1,45 @@
+"""模型测试：pydantic 模型与 `qq_guild.models.lite` 每条消息占用的内存与构造耗时
+
+    python -m tests.bench_models
+"""
+import gc
+import time
+import tracemalloc
+
+from qq_guild.models import api, lite
+
+MESSAGES = 20000
+
+def message(i: int) -> dict:
+    return {
+        "id": f"08e092eeb983afef9e011a{i:08d}", "channel_id": "1234567", "guild_id": "7654321",
+        "content": "<@!123> 你好，这是一条消息", "timestamp": "2022-01-01T00:00:00+08:00",
+        "author": {"id": "1234567890", "username": "用户名", "avatar": "https://thirdqq.qlogo.cn/0", "bot": False},
+        "member": {"roles": ["1", "4"], "joined_at": "2021-01-01T00:00:00+08:00"},
+        "seq": i, "seq_in_channel": str(i)
+    }
+
+def measure(name: str, model) -> tuple:
+    payloads = [message(i) for i in range(MESSAGES)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    messages = [model.parse_obj(payload) for payload in payloads]
+    # 字符串与原始数据共享，只统计模型对象本身的开销
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del messages
+    # 单独计时，不受 tracemalloc 开销影响
+    start = time.perf_counter()
+    messages = [model.parse_obj(payload) for payload in payloads]
+    elapsed = time.perf_counter() - start
+    print(f"{name:<12}{size / len(messages):>10,.0f} bytes/message{elapsed / len(messages) * 1e6:>10.2f} us/message")
+    return size, elapsed
+
+def main():
+    size, elapsed = measure("pydantic", api.Message)
+    lite_size, lite_elapsed = measure("lite", lite.Message)
+    print(f"{'':<12}{size / lite_size:>10.1f}x memory{elapsed / lite_elapsed:>15.1f}x time")
+
+if __name__ == "__main__":
+    main()
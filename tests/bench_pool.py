@@ -0,0 +1,50 @@
+"""REST 连接池测试：对本地模拟服务依次与并发调用 `send_message`，比较共享连接池与每个请求新建 ClientSession
+
+    python -m tests.bench_pool
+"""
+import asyncio
+import time
+
+import aiohttp
+
+from logbook import NullHandler
+
+from qq_guild.protocol import GuildBotProtocol
+from qq_guild.replay import MockAPI
+
+REQUESTS = 300
+
+class Unpooled(GuildBotProtocol):
+    """每个请求新建 ClientSession，不复用连接"""
+    async def _request(self, method, endpoint, params=None, data_map=None, idempotent=None, body=None):
+        async with aiohttp.ClientSession() as session:
+            async with session.request(method, f"{self.url}{endpoint}", params=params, json=data_map, headers=self._headers) as response:
+                data = await response.read()
+        return response, data
+
+async def measure(protocol: GuildBotProtocol) -> dict:
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await protocol.send_message("0", content="bench")
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(*(protocol.send_message("0", content="bench") for _ in range(REQUESTS)))
+    concurrent = time.perf_counter() - start
+    await protocol.close()
+    return {"sequential": sequential / REQUESTS, "concurrent": concurrent / REQUESTS}
+
+async def main():
+    mock = MockAPI()
+    await mock.start()
+    try:
+        print(f"{'client':<20}{'sequential':>14}{'concurrent':>14}")
+        for cls in (Unpooled, GuildBotProtocol):
+            result = await measure(cls(mock.url, "Bot bench"))
+            print(f"{cls.__name__:<20}{result['sequential'] * 1000:>11.3f} ms{result['concurrent'] * 1000:>11.3f} ms")
+    finally:
+        await mock.close()
+
+if __name__ == "__main__":
+    with NullHandler().applicationbound():
+        asyncio.run(main())
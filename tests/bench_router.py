@@ -0,0 +1,53 @@
+"""命令路由测试：`CommandRouter.match` 与逐个比较命令前缀的线性扫描在不同命令数量下的耗时
+
+    python -m tests.bench_router
+"""
+import random
+import time
+
+from qq_guild.command import CommandRouter
+from qq_guild.filters import strip_mention
+
+MESSAGES = 20000
+COUNTS = (10, 100, 1000)
+
+def linear_match(names: list, prefix: str, content: str):
+    """依次检查每个命令，等价于每个命令注册一个前缀过滤的事件处理器"""
+    text = strip_mention(content)
+    for name in names:
+        key = prefix + name
+        if text.startswith(key) and (len(text) == len(key) or text[len(key)].isspace()):
+            return name, text[len(key):]
+    return None, text
+
+def messages(names: list, count: int = MESSAGES, seed: int = 0) -> list:
+    """命中随机命令的消息与不匹配任何命令的普通消息各占一半"""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            result.append(f"<@!123> /{rng.choice(names)} 1 2 3")
+        else:
+            result.append("<@!123> 你好，这是一条普通消息")
+    return result
+
+def measure(match, contents: list) -> float:
+    start = time.perf_counter()
+    for content in contents:
+        match(content)
+    return (time.perf_counter() - start) / len(contents)
+
+def main():
+    print(f"{'commands':>10}{'trie':>14}{'linear':>14}")
+    for count in COUNTS:
+        names = [f"command{i}" for i in range(count)]
+        router = CommandRouter(prefix="/")
+        for name in names:
+            router.add_command(lambda bot, message: None, name)
+        contents = messages(names)
+        trie = measure(router.match, contents)
+        linear = measure(lambda content: linear_match(names, "/", content), contents)
+        print(f"{count:>10}{trie * 1e6:>11.2f} us{linear * 1e6:>11.2f} us")
+
+if __name__ == "__main__":
+    main()
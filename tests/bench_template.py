@@ -0,0 +1,66 @@
+"""消息模板测试：每条消息构造模型并 `dict` + `dumps` 与 `MessageTemplate.render` 的请求体生成速度
+
+    python -m tests.bench_template
+"""
+import time
+
+from qq_guild.codec import default_codec
+from qq_guild.models import MessageArk, MessageArkObj, MessageArkObjKv, MessageEmbed, MessageEmbedField
+from qq_guild.template import MessageTemplate
+
+PAYLOADS = 20000
+
+def embed(name: str, level: int) -> MessageEmbed:
+    return MessageEmbed(
+        title=f"{name} 的资料",
+        description="频道成员资料",
+        prompt=f"{name} 的资料",
+        timestamp="2022-01-01T00:00:00+08:00",
+        fields=[
+            MessageEmbedField(name="昵称", value=name),
+            MessageEmbedField(name="等级", value=str(level)),
+            MessageEmbedField(name="签名", value="这个人很懒，什么都没有留下")
+        ]
+    )
+
+def ark(name: str, level: int) -> MessageArk:
+    return MessageArk(template_id=23, kv=[
+        MessageArkObj(obj=[MessageArkObjKv(key="#DESC#", value=f"{name} 的资料")]),
+        MessageArkObj(obj=[MessageArkObjKv(key="#PROMPT#", value=f"{name} 升到了 {level} 级")]),
+        MessageArkObj(obj=[
+            MessageArkObjKv(key="desc", value=f"等级 {level}"),
+            MessageArkObjKv(key="link", value="https://qun.qq.com")
+        ])
+    ])
+
+def dumps_embed(message_id: str, name: str, level: int) -> bytes:
+    # 与 send_message 相同：构造模型后转为 dict 再编码
+    return default_codec.dumps_bytes({"msg_id": message_id, "embed": embed(name, level).dict(by_alias=True, exclude_none=True)})
+
+def dumps_ark(message_id: str, name: str, level: int) -> bytes:
+    return default_codec.dumps_bytes({"msg_id": message_id, "ark": ark(name, level).dict(exclude_none=True)})
+
+def measure(name: str, render) -> float:
+    start = time.perf_counter()
+    for i in range(PAYLOADS):
+        render(str(i), "用户名", i)
+    rate = PAYLOADS / (time.perf_counter() - start)
+    print(f"{name:<24}{rate:>12,.0f} payloads/s")
+    return rate
+
+def main():
+    embed_template = MessageTemplate(embed=embed("{name}", "{level}"))
+    ark_template = MessageTemplate(ark=ark("{name}", "{level}"))
+    # 两种方式得到相同的请求体
+    assert default_codec.loads(embed_template.render("0", name="用户名", level=0)) == default_codec.loads(dumps_embed("0", "用户名", 0))
+    assert default_codec.loads(ark_template.render("0", name="用户名", level=0)) == default_codec.loads(dumps_ark("0", "用户名", 0))
+
+    baseline = measure("embed dict + dumps", dumps_embed)
+    rate = measure("embed template", lambda message_id, name, level: embed_template.render(message_id, name=name, level=level))
+    print(f"{'':<24}{rate / baseline:>11.1f}x")
+    baseline = measure("ark dict + dumps", dumps_ark)
+    rate = measure("ark template", lambda message_id, name, level: ark_template.render(message_id, name=name, level=level))
+    print(f"{'':<24}{rate / baseline:>11.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import unittest
+
+from qq_guild.protocol import GuildBotProtocol
+
+class BulkMuteTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.protocol = GuildBotProtocol("http://127.0.0.1:1", "Bot test")
+        self.patches = []
+
+        async def _patch(endpoint, data_map=None):
+            self.patches.append((endpoint, data_map))
+
+        self.protocol._patch = _patch
+
+    async def asyncTearDown(self):
+        await self.protocol.close()
+
+    async def test_missing_duration_raises_before_start(self):
+        with self.assertRaises(ValueError):
+            self.protocol.bulk_mute("guild", ["1", "2"])
+        with self.assertRaises(ValueError):
+            await self.protocol.mute("guild", "1")
+        with self.assertRaises(ValueError):
+            await self.protocol.mute_all("guild")
+        self.assertEqual(self.patches, [])
+
+    async def test_bulk_mute(self):
+        results = [result async for result in self.protocol.bulk_mute("guild", ["1", "2"], mute_seconds=60)]
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(
+            sorted(self.patches),
+            [
+                ("/guilds/guild/members/1/mute", {"mute_seconds": "60"}),
+                ("/guilds/guild/members/2/mute", {"mute_seconds": "60"})
+            ]
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import signal
+import threading
+import time
+import unittest
+
+from aiohttp import WSMsgType, web
+
+from qq_guild.application import GuildBot
+from qq_guild.cluster import ClusterSupervisor
+from qq_guild.replay import MockAPI
+from qq_guild.shard import ShardManager
+
+class FakeGateway(MockAPI):
+    """在 MockAPI 的基础上提供 `/gateway/bot` 与 Gateway 连接，记录每次鉴权的时间与分片"""
+    def __init__(self, shards: int):
+        super().__init__()
+        self.shards = shards
+        self.identifies = []
+        self.messages = []
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        if request.path == "/gateway/bot":
+            return web.json_response({
+                "url": f"{self.url.replace('http', 'ws')}/ws",
+                "shards": self.shards,
+                "session_start_limit": {"total": 1000, "remaining": 1000, "reset_after": 0, "max_concurrency": 1}
+            })
+        if request.path == "/ws":
+            return await self._gateway(request)
+        if request.method == "POST":
+            self.messages.append((await request.json())["content"])
+        return await super()._handle(request)
+
+    async def _gateway(self, request: web.Request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_json({"op": 10, "d": {"heartbeat_interval": 60000}})
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                break
+            payload = json.loads(message.data)
+            if payload["op"] == 2:
+                shard = payload["d"]["shard"]
+                self.identifies.append((time.monotonic(), shard[0]))
+                await ws.send_json({"op": 0, "s": 1, "t": "READY", "d": {
+                    "version": 1,
+                    "session_id": f"session-{len(self.identifies)}",
+                    "user": {"id": "bot", "username": "bot", "bot": True},
+                    "shard": shard
+                }})
+            elif payload["op"] == 1:
+                await ws.send_json({"op": 11})
+        return ws
+
+def wait_until(predicate, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+class ClusterTest(unittest.TestCase):
+    def setUp(self):
+        self.gateway = FakeGateway(shards=4)
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self.gateway.start())
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+        self.intervals = ShardManager.IDENTIFY_INTERVAL, ClusterSupervisor.RESTART_DELAY
+        ShardManager.IDENTIFY_INTERVAL = 0.2
+        ClusterSupervisor.RESTART_DELAY = 0.2
+
+    def tearDown(self):
+        ShardManager.IDENTIFY_INTERVAL, ClusterSupervisor.RESTART_DELAY = self.intervals
+        asyncio.run_coroutine_threadsafe(self.gateway.close(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+
+    def test_cluster(self):
+        bot = GuildBot("1", "token", sandbox=False)
+        bot.url = self.gateway.url
+        # 通过 `cluster.call` 调用时返回执行调用的工作进程
+        bot.whoami = lambda: bot.cluster.worker_id
+
+        @bot.receiver("READY")
+        async def ready(bot, event):
+            other = (bot.cluster.worker_id + 1) % 2
+            executed_by = await bot.cluster.call("whoami", worker=other)
+            await bot.send_message("0", content=f"call {bot.cluster.worker_id} {executed_by}")
+            bot.cluster.publish("PING", bot.cluster.worker_id)
+
+        @bot.receiver("PING")
+        async def ping(bot, event):
+            await bot.send_message("0", content=f"ping {bot.cluster.worker_id} {event}")
+
+        supervisor = ClusterSupervisor(bot, 2)
+        messages = self.gateway.messages
+        identifies = self.gateway.identifies
+        result = {}
+
+        def control():
+            try:
+                result["started"] = wait_until(lambda: len(identifies) >= 4 and len(messages) >= 12)
+                # 结束一个工作进程，主进程应重启它并重新鉴权其负责的分片
+                os.kill(supervisor.workers[0].pid, signal.SIGKILL)
+                result["restarted"] = wait_until(lambda: len(identifies) >= 6)
+            finally:
+                supervisor._stopping = True
+
+        controller = threading.Thread(target=control)
+        controller.start()
+        supervisor.run()
+        controller.join()
+
+        self.assertTrue(result["started"], (identifies, messages))
+        self.assertTrue(result["restarted"], identifies)
+
+        # 同一个 identify 桶的鉴权间隔不少于 IDENTIFY_INTERVAL
+        times = [t for t, _ in identifies[:4]]
+        self.assertEqual(sorted(shard for _, shard in identifies[:4]), [0, 1, 2, 3])
+        for earlier, later in zip(times, times[1:]):
+            self.assertGreaterEqual(later - earlier, 0.18)
+        # 重启的工作进程负责分片 0 与 2
+        self.assertEqual(sorted(shard for _, shard in identifies[4:6]), [0, 2])
+
+        # 每个工作进程的调用都由另一个工作进程执行
+        self.assertIn("call 0 1", messages)
+        self.assertIn("call 1 0", messages)
+        # 广播的事件发送给了所有工作进程
+        for receiver in (0, 1):
+            for sender in (0, 1):
+                self.assertIn(f"ping {receiver} {sender}", messages)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from qq_guild.cache import MessageHistory
+from qq_guild.models import lite
+
+def message(message_id: str, channel_id: str):
+    return lite.Message.parse_obj({"id": message_id, "channel_id": channel_id, "guild_id": "guild", "content": message_id})
+
+class MessageHistoryTest(unittest.TestCase):
+    def test_recent_non_positive_limit(self):
+        history = MessageHistory()
+        for i in range(3):
+            history.add(message(str(i), "c"))
+        self.assertEqual(history.recent("c", 0), [])
+        self.assertEqual(history.recent("c", -1), [])
+        self.assertEqual([m.id for m in history.recent("c", 2)], ["1", "2"])
+        self.assertEqual([m.id for m in history.recent("c")], ["0", "1", "2"])
+
+    def test_per_channel_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            MessageHistory(per_channel=0)
+
+    def test_eviction(self):
+        history = MessageHistory(per_channel=2, max_messages=3)
+        for i in range(3):
+            history.add(message(f"a{i}", "a"))
+        # 子频道缓冲区已满时移除该子频道最早的消息
+        self.assertEqual([m.id for m in history.recent("a")], ["a1", "a2"])
+        self.assertIsNone(history.get("a0"))
+
+        history.add(message("b0", "b"))
+        history.add(message("b1", "b"))
+        # 总数超出上限时从最久没有新消息的子频道中移除
+        self.assertEqual(len(history), 3)
+        self.assertEqual([m.id for m in history.recent("a")], ["a2"])
+        self.assertEqual(history.stats()["channel_evictions"], 1)
+        self.assertEqual(history.stats()["global_evictions"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
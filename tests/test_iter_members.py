@@ -0,0 +1,46 @@
+import unittest
+
+from qq_guild.protocol import GuildBotProtocol
+
+def member(user_id: str) -> dict:
+    return {"user": {"id": user_id, "username": user_id}, "nick": "", "roles": [], "joined_at": "1970-01-01T00:00:00+00:00"}
+
+class IterMembersTest(unittest.IsolatedAsyncioTestCase):
+    async def collect(self, pages: dict, prefetch: bool):
+        """`pages` 为 after -> 成员 ID 列表，未列出的 after 返回空页"""
+        protocol = GuildBotProtocol("http://127.0.0.1:1", "Bot test")
+        calls = []
+
+        async def get_member_list(guild_id, after, limit=1):
+            calls.append(after)
+            if len(calls) > 20:
+                raise AssertionError("翻页没有结束")
+            return [protocol.models.Member.parse_obj(member(user_id)) for user_id in pages.get(after, [])]
+
+        protocol.get_member_list = get_member_list
+        user_ids = [m.user.id async for m in protocol.iter_members("guild", prefetch=prefetch)]
+        await protocol.close()
+        return user_ids, calls
+
+    async def test_pages_and_duplicates(self):
+        # 相邻两页重复返回成员 2 与 3
+        pages = {"0": ["1", "2"], "2": ["2", "3"], "3": ["3"]}
+        for prefetch in (False, True):
+            user_ids, calls = await self.collect(pages, prefetch)
+            self.assertEqual(user_ids, ["1", "2", "3"])
+            self.assertEqual(calls, ["0", "2", "3"])
+
+    async def test_page_repeating_cursor_stops(self):
+        # 以游标对应的成员结尾的页面没有进展，两种模式都应停止
+        pages = {"0": ["1", "2"], "2": ["2"]}
+        for prefetch in (False, True):
+            user_ids, calls = await self.collect(pages, prefetch)
+            self.assertEqual(user_ids, ["1", "2"])
+            self.assertEqual(calls, ["0", "2"])
+
+    async def test_empty_guild(self):
+        for prefetch in (False, True):
+            self.assertEqual(await self.collect({}, prefetch), ([], ["0"]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import asyncio
+import random
+import unittest
+
+from types import SimpleNamespace
+
+from qq_guild.dispatcher import EventDispatcher, Handler, KeyedWorkerPool, by_author, by_channel
+
+def fake_stream(keys: int, per_key: int, seed: int = 0):
+    """按随机顺序交错的事件流，每个子频道内的 seq 递增"""
+    rng = random.Random(seed)
+    pending = {f"channel-{i}": 0 for i in range(keys)}
+    events = []
+    while pending:
+        channel_id = rng.choice(list(pending))
+        events.append(SimpleNamespace(channel_id=channel_id, seq=pending[channel_id]))
+        pending[channel_id] += 1
+        if pending[channel_id] == per_key:
+            del pending[channel_id]
+    return events
+
+class KeyedWorkerPoolTest(unittest.IsolatedAsyncioTestCase):
+    async def run_stream(self, pool: KeyedWorkerPool, events, delay: float = 0.001):
+        handled = {}
+        rng = random.Random(1)
+
+        async def callback(bot, event):
+            # 随机耗时，不同事件的完成顺序与提交顺序不同
+            await asyncio.sleep(rng.random() * delay)
+            handled.setdefault(event.channel_id, []).append(event.seq)
+
+        handler = Handler(callback, "AT_MESSAGE_CREATE", pool=pool.name)
+        dispatcher = EventDispatcher([pool])
+        for event in events:
+            await dispatcher.dispatch(None, [handler], event)
+        await pool.drain()
+        await pool.close()
+        return handled, handler
+
+    async def test_order_per_key(self):
+        events = fake_stream(keys=50, per_key=20)
+        pool = KeyedWorkerPool("keyed", lanes=8, queue_size=16)
+        handled, handler = await self.run_stream(pool, events)
+
+        self.assertEqual(handler.calls, len(events))
+        self.assertEqual(handler.errors, 0)
+        self.assertEqual(len(handled), 50)
+        for seqs in handled.values():
+            self.assertEqual(seqs, list(range(20)))
+
+    async def test_keys_share_fixed_lanes(self):
+        pool = KeyedWorkerPool("keyed", lanes=4)
+        handled, _ = await self.run_stream(pool, fake_stream(keys=1000, per_key=2), delay=0)
+
+        self.assertEqual(len(handled), 1000)
+        self.assertEqual(pool.workers, 4)
+        for seqs in handled.values():
+            self.assertEqual(seqs, [0, 1])
+
+    async def test_lanes_run_concurrently(self):
+        in_flight = 0
+        peak = 0
+
+        async def callback(bot, event):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+        pool = KeyedWorkerPool("keyed", lanes=8)
+        handler = Handler(callback, "AT_MESSAGE_CREATE", pool="keyed")
+        for event in fake_stream(keys=64, per_key=2):
+            await pool.submit(handler, None, event)
+        await pool.drain()
+        await pool.close()
+
+        self.assertGreater(peak, 1)
+        self.assertLessEqual(peak, 8)
+
+    def test_key_functions(self):
+        message = SimpleNamespace(channel_id="c", guild_id="g", author=SimpleNamespace(id="u"))
+        self.assertEqual(by_channel(message), "c")
+        self.assertEqual(by_author(message), "u")
+        self.assertIsNone(by_author(SimpleNamespace()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+
+from qq_guild.errors import GuildBotError, NetworkError
+from qq_guild.outbox import Outbox
+from qq_guild.protocol import GuildBotProtocol
+
+class OutboxTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "outbox.jsonl")
+        self.posts = []
+        self.failing = True
+
+    async def asyncTearDown(self):
+        self.tmp.cleanup()
+
+    def make_protocol(self, outbox: Outbox) -> GuildBotProtocol:
+        protocol = GuildBotProtocol("http://127.0.0.1:1", "Bot test", outbox=outbox)
+
+        async def _post(endpoint, data_map=None):
+            self.posts.append((endpoint, data_map))
+            if self.failing:
+                raise NetworkError("POST", endpoint, ConnectionResetError())
+            return {"id": str(len(self.posts))}
+
+        protocol._post = _post
+        return protocol
+
+    async def test_gives_up_after_max_attempts(self):
+        protocol = self.make_protocol(Outbox(window=0.01, max_attempts=3))
+        with self.assertRaises(NetworkError):
+            await protocol.outbox.put("channel", {"content": "a"})
+        self.assertEqual(len(self.posts), 3)
+        self.assertEqual(protocol.outbox.stats()["failed"], 1)
+        self.assertEqual(protocol.outbox.stats()["pending"], 0)
+
+        # 网络恢复后后续消息正常发送
+        self.failing = False
+        self.assertEqual(await protocol.outbox.put("channel", {"content": "b"}), {"id": "4"})
+        await protocol.close()
+
+    async def test_close_settles_pending_futures(self):
+        protocol = self.make_protocol(Outbox(window=0.01, max_attempts=1000, path=self.path))
+        future = protocol.outbox.put("channel", {"content": "a"})
+        # 模拟 close 中的 flush 被中断，仍在队列中的消息应以异常结束
+        async def cancelled_flush():
+            protocol.outbox._flush_now.set()
+            for task in list(protocol.outbox._tasks.values()):
+                task.cancel()
+        protocol.outbox.flush = cancelled_flush
+        await protocol.close()
+        with self.assertRaises(GuildBotError):
+            await future
+
+        # 未发送的消息保留在文件中，重启后恢复
+        outbox = Outbox(window=0.01, path=self.path)
+        self.assertEqual(outbox.stats()["pending"], 1)
+        self.failing = False
+        protocol = self.make_protocol(outbox)
+        await protocol.close()
+        self.assertEqual(self.posts[-1], ("/channels/channel/messages", {"content": "a"}))
+        self.assertEqual(Outbox(path=self.path).stats()["pending"], 0)
+
+    async def test_for_worker_uses_separate_journal(self):
+        outbox = Outbox(window=0.01, path=self.path)
+        protocol = self.make_protocol(outbox)
+        # 主进程在 fork 前关闭发件箱
+        await protocol.close()
+
+        outbox.for_worker(1)
+        self.assertEqual(outbox.path, os.path.join(self.tmp.name, "outbox.1.jsonl"))
+        self.failing = False
+        self.assertEqual(await outbox.put("channel", {"content": "a"}), {"id": "1"})
+        await protocol.close()
+        self.assertTrue(os.path.exists(outbox.path))
+
+    async def test_for_worker_with_pending_messages_raises(self):
+        protocol = self.make_protocol(Outbox(window=10, path=self.path))
+        protocol.outbox.put("channel", {"content": "a"})
+        with self.assertRaises(GuildBotError):
+            protocol.outbox.for_worker(1)
+        self.failing = False
+        await protocol.close()
+
+if __name__ == "__main__":
+    unittest.main()